@@ -1,5 +1,7 @@
 # constants.py 
 
+import os
+
 # Display Variables
 WIDTH, HEIGHT = 1920, 1080
 COLOR_TEXT = (255, 255, 255)
@@ -11,6 +13,11 @@ G = 6.67428e-11  # Gravitational constant
 
 # Scale Factors
 DEFAULT_SCALE = 350 / AU  # 1 AU = 350 px
+ZOOM_STEP = 1.1  # Zoom factor per mouse wheel step
+ZOOM_LIMITS = (0.05, 10)  # Smallest and largest zoom as multiples of DEFAULT_SCALE
+PICK_CELL_SIZE = 16  # Cell size of the picking grid in px
+PICK_RADIUS = 6  # Largest distance in px between the cursor and a picked body
+CLICK_TOLERANCE = 3  # Cursor movement in px up to which a left click selects instead of dragging
 OUTER_PLANET_SCALE_FACTOR = 0.6  # Outer Planets are 40% smaller
 BASE_SIZE = 50  # Base size for planets in px
 earth_diameter = 12742e3  # Earth's diameter in meters
@@ -18,6 +25,69 @@ earth_diameter = 12742e3  # Earth's diameter in meters
 # Simulation Speed
 TIMESTEP = 3600 * 24.0 # Seconds in 1 day 
 
+# Orbit trails
+TRAIL_LENGTH = 20000  # Maximum points in the orbit trail of a body
+TRAIL_FADE_BUCKETS = 64  # Number of fade colors a trail is drawn with
+TRAIL_LOD_TOLERANCE = 1.0  # Screen-space simplification of trails in px, 0 draws every point
+TRAIL_LOD_ZOOM_STEP = 1.25  # Zoom factor after which a simplified trail is rebuilt
+TRAIL_LOD_CHUNK = 256  # Trail points per independently simplified chunk
+TRAIL_LAYER_MARGIN = 256  # Pixels the persistent trail layer extends beyond each screen edge for panning
+TRAIL_LAYER_REFRESH = 1.0  # Fade buckets a trail may grow before the trail layer is redrawn
+
+# Ephemerides
+EPHEMERIS_KERNEL = 'de440s.bsp'
+# Per-user cache directory ($XDG_CACHE_HOME or ~/.cache), the environment variable overrides the file
+EPHEMERIS_CACHE_PATH = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'),
+                                    'solarsystem', 'ephemeris_cache.json')
+EPHEMERIS_CACHE_ENV_VAR = "SOLARSYSTEM_EPHEMERIS_CACHE"
+
+# Checkpoints
+CHECKPOINT_PATH = 'checkpoint.npz'  # Quick save (F5), autosave and --resume default
+CHECKPOINT_AUTOSAVE_INTERVAL = 30.0  # Seconds between autosaves with --autosave
+
+# Replays of recorded trajectories
+REPLAY_TRAIL_POINTS = 2000  # Frames read to rebuild the trails after a jump
+REPLAY_SCRUB_FRACTION = 0.01  # Share of the recording skipped per arrow key press
+
+# Frame profile (key [F3], --trace)
+FRAME_PROFILE_WINDOW = 300  # Frames the percentiles and the graph are computed over
+TRACE_FRAMES = 300  # Frames written by --trace
+
+# Benchmarks (solarsystem_benchmark.py)
+BENCHMARK_BODY_COUNTS = (400, 4000, 40000, 400000, 1000000)
+BENCHMARK_TRAIL_LENGTHS = (1000, 5000, 20000)
+BENCHMARK_ZOOM_LEVELS = (0.25, 1.0, 4.0)  # Multiples of DEFAULT_SCALE
+BENCHMARK_MIN_TIME = 0.5  # Seconds spent on each measurement (at least 3 runs)
+BENCHMARK_REGRESSION_THRESHOLD = 0.15  # Slowdown of the median that counts as a regression
+BENCHMARK_NOISE_FLOOR = 0.05  # ms, smaller changes are never reported
+
+# Physics
+MASSIVE_BODY_THRESHOLD = 1e18  # kg, lighter bodies are treated as test particles
+DEFAULT_INTEGRATOR = "leapfrog"
+
+# Compute backends (--backend, or the environment variable)
+DEFAULT_BACKEND = "numpy"
+BACKEND_ENV_VAR = "SOLARSYSTEM_BACKEND"
+BACKEND_PARITY_TOLERANCE = 1e-9  # AU, largest position difference to the reference backend
+
+# Fast-forward (Simulation.advance, key [J])
+FAST_FORWARD_YEARS = 100  # Years skipped per key press
+FAST_FORWARD_STEPS_PER_ORBIT = 4  # Block steps per orbit of the fastest body, orbits are counted from the angle swept per step
+FAST_FORWARD_PROGRESS_INTERVAL = 0.1  # Seconds of wall time between progress updates
+
+# Analytic Kepler orbits of test particles (--kepler)
+KEPLER_TOLERANCE = 1e-12  # rad, convergence of the eccentric anomaly
+KEPLER_MAX_ITERATIONS = 30
+
+# Barnes-Hut self-gravity of asteroids and TNOs
+BARNES_HUT_OPENING_ANGLE = 0.5  # Smaller is more accurate and slower
+BARNES_HUT_LEAF_SIZE = 8  # Maximum particles in a leaf node
+BARNES_HUT_SOFTENING = 1e7  # m, avoids singular forces in close encounters
+
+# Block time steps (integrator "block")
+BLOCK_STEPS_PER_ORBIT = 128  # Minimum steps per orbit for every body
+BLOCK_MAX_LEVEL = 10  # Finest level is TIMESTEP / 2**BLOCK_MAX_LEVEL
+
 # Solar System Colors
 COLOR_SUN = (252, 150, 1)
 COLOR_MERCURY = (173, 168, 165)
@@ -1,20 +1,28 @@
 import constants
+import pygame
 
+TITLE = "Solar System Simulation v.1.9"
 
-def render_menu_texts(screen, font, clock, total_elapsed_time, planet_data, title="Solar System Simulation v.1.9"):
-    """Render HUD overlays (FPS, elapsed time, controls, and planet table)."""
-    # Displaying FPS in the upper left corner
-    fps_text = "FPS: " + str(int(clock.get_fps()))
-    fps_surface = font.render(fps_text, True, constants.COLOR_TEXT)
-    screen.blit(fps_surface, (15, 15))
+DEFAULT_NAVIGATION = [
+    ("Mouse Wheel", "Zoom In/Out"),
+    ("[Left Click] + Drag", "Move View"),
+    ("[Left Click]", "Select Body"),
+    ("[F]", "Follow Selected"),
+    ("[+] / [-]", "Adjust Speed"),
+    ("[J]", "Fast-Forward 100 Years"),
+    ("[F3]", "Frame Profile"),
+    ("[F5]", "Save Checkpoint"),
+    ("[F12]", "Take Screenshot"),
+    ("[ESC]", "Quit Simulation"),
+]
 
-    # Displaying title in the upper right corner
-    title_surface = font.render(title, True, constants.COLOR_TEXT)
-    title_width, title_height = title_surface.get_size()
-    upper_right_x = screen.get_width() - title_width - 15
-    upper_right_y = 15
-    screen.blit(title_surface, (upper_right_x, upper_right_y))
-    
+# Column widths of the navigation table (lower left) and the planet table (lower right)
+NAV_COLUMN_WIDTHS = (160, 120)
+PLANET_COLUMN_WIDTHS = (80, 180, 60)
+
+
+def format_elapsed_time(total_elapsed_time):
+    """Format simulated seconds as e.g. "Time: 3y 120d 4h 12m"."""
     # Convert seconds to years, days, hours, minutes, seconds
     years = int(total_elapsed_time // (365.25 * 24 * 3600))
     remaining_time = total_elapsed_time % (365.25 * 24 * 3600)
@@ -24,40 +32,110 @@ def render_menu_texts(screen, font, clock, total_elapsed_time, planet_data, titl
     remaining_time = remaining_time % 3600
     minutes = int(remaining_time // 60)
     seconds = int(remaining_time % 60)
-    
-    # Format time display
+
     if years > 0:
-        time_text = f"Time: {years}y {days}d {hours}h {minutes}m"
+        return f"Time: {years}y {days}d {hours}h {minutes}m"
     elif days > 0:
-        time_text = f"Time: {days}d {hours}h {minutes}m"
+        return f"Time: {days}d {hours}h {minutes}m"
     elif hours > 0:
-        time_text = f"Time: {hours}h {minutes}m {seconds}s"
-    else:
-        time_text = f"Time: {minutes}m {seconds}s"
+        return f"Time: {hours}h {minutes}m {seconds}s"
+    return f"Time: {minutes}m {seconds}s"
+
+
+def render_progress(screen, font, fraction, text):
+    """Render a centered progress bar with a caption above it."""
+    width, height = 400, 16
+    x = (screen.get_width() - width) // 2
+    y = (screen.get_height() - height) // 2
+
+    caption = font.render(text, True, constants.COLOR_TEXT)
+    screen.blit(caption, ((screen.get_width() - caption.get_width()) // 2, y - caption.get_height() - 8))
+    screen.fill(constants.COLOR_BACKGROUND, (x, y, width, height))
+    screen.fill(constants.COLOR_TEXT, (x, y, int(width * min(max(fraction, 0.0), 1.0)), height))
+
+
+def render_tooltip(screen, font, lines, pos):
+    """Render a boxed tooltip next to the cursor, kept on the screen."""
+    surfaces = [font.render(line, True, constants.COLOR_TEXT) for line in lines]
+    width = max(surface.get_width() for surface in surfaces) + 12
+    height = sum(surface.get_height() + 2 for surface in surfaces) + 10
+    x = min(pos[0] + 16, screen.get_width() - width)
+    y = min(pos[1] + 16, screen.get_height() - height)
+
+    screen.fill(constants.COLOR_BACKGROUND, (x, y, width, height))
+    pygame.draw.rect(screen, constants.COLOR_TEXT, (x, y, width, height), 1)
+    for surface in surfaces:
+        screen.blit(surface, (x + 6, y + 5))
+        y += surface.get_height() + 2
+
+
+def render_frame_profile(screen, font, stats, frame_times, target_ms, x=15, y=45):
+    """Render the frame profile panel: p50/p95/max per phase and a frame-time graph."""
+    col1_width = 90  # Phase names
+    col_width = 60  # Milliseconds columns
+
+    # Table of the phase timings in ms
+    columns = [x, x + col1_width, x + col1_width + col_width, x + col1_width + 2 * col_width]
+    for col_x, header in zip(columns, ["Phase", "p50", "p95", "max"]):
+        screen.blit(font.render(header, True, constants.COLOR_TEXT), (col_x, y))
+    for i, (name, *values) in enumerate(stats):
+        row_y = y + 25 + i * 20  # 25px spacing after header, 20px between rows
+        screen.blit(font.render(name, True, constants.COLOR_TEXT), (columns[0], row_y))
+        for col_x, value in zip(columns[1:], values):
+            screen.blit(font.render(f"{value:.1f}", True, constants.COLOR_TEXT), (col_x, row_y))
+
+    # Frame times of the last frames, oldest on the left, with a line at the target frame time
+    graph_width, graph_height = col1_width + 3 * col_width, 60
+    graph_y = y + 35 + len(stats) * 20
+    screen.fill((0, 0, 0), (x, graph_y, graph_width, graph_height))
+    if len(frame_times) >= 2:
+        top = max(2 * target_ms, 1000 * max(frame_times))
+        target_y = graph_y + graph_height - int(graph_height * target_ms / top)
+        pygame.draw.line(screen, (90, 90, 90), (x, target_y), (x + graph_width - 1, target_y))
+        step = graph_width / (frame_times.maxlen or len(frame_times))
+        points = [(x + int(i * step), graph_y + graph_height - 1 - int((graph_height - 1) * 1000 * t / top))
+                  for i, t in enumerate(frame_times)]
+        pygame.draw.lines(screen, constants.COLOR_TEXT, False, points)
+
+
+def render_menu_texts(screen, font, clock, total_elapsed_time, planet_data, title=TITLE,
+                      navigation_data=None, status_text=None):
+    """Render HUD overlays (FPS, elapsed time, controls, and planet table)."""
+    # Displaying FPS in the upper left corner
+    fps_text = "FPS: " + str(int(clock.get_fps()))
+    fps_surface = font.render(fps_text, True, constants.COLOR_TEXT)
+    screen.blit(fps_surface, (15, 15))
+
+    # Displaying title in the upper right corner
+    title_surface = font.render(title, True, constants.COLOR_TEXT)
+    title_width, title_height = title_surface.get_size()
+    upper_right_x = screen.get_width() - title_width - 15
+    upper_right_y = 15
+    screen.blit(title_surface, (upper_right_x, upper_right_y))
     
-    time_surface = font.render(time_text, True, constants.COLOR_TEXT)
+    time_surface = font.render(format_elapsed_time(total_elapsed_time), True, constants.COLOR_TEXT)
     time_width, time_height = time_surface.get_size()
     time_x = screen.get_width() - time_width - 15
     time_y = upper_right_y + title_height + 5  # 5px spacing below title
     screen.blit(time_surface, (time_x, time_y))
 
+    # Optional status line below the time (e.g. replay position)
+    if status_text:
+        status_surface = font.render(status_text, True, constants.COLOR_TEXT)
+        status_x = screen.get_width() - status_surface.get_width() - 15
+        screen.blit(status_surface, (status_x, time_y + time_height + 5))
+
     # Displaying navigation table in the lower left corner
     nav_headers = ["Controls", "Action"]
-    navigation_data = [
-        ("Mouse Wheel", "Zoom In/Out"),
-        ("[Left Click] + Drag", "Move View"),
-        ("[+] / [-]", "Adjust Speed"),
-        ("[F12]", "Take Screenshot"),
-        ("[ESC]", "Quit Simulation"),
-    ]
+    if navigation_data is None:
+        navigation_data = DEFAULT_NAVIGATION
 
     # Define column widths for navigation table
-    nav_col1_width = 160   # Controls column
-    nav_col2_width = 120   # Action column
+    nav_col1_width, nav_col2_width = NAV_COLUMN_WIDTHS  # Controls and Action columns
 
     # Initial position for lower left corner navigation table
     lower_left_x = 15  # Left aligned
-    lower_left_y = screen.get_height() - 160  # Fixed starting y position
+    lower_left_y = screen.get_height() - 35 - 25 * len(navigation_data)  # Grows upwards with the rows
     
     # Render navigation table headers
     nav_header1 = font.render(nav_headers[0], True, constants.COLOR_TEXT)
@@ -83,9 +161,7 @@ def render_menu_texts(screen, font, clock, total_elapsed_time, planet_data, titl
     table_headers = ["Planets", "Distance from the Sun", "Orbits"]
 
     # Define column widths for alignment
-    col1_width = 80   # Planet names
-    col2_width = 180  # Distance
-    col3_width = 60   # Orbits
+    col1_width, col2_width, col3_width = PLANET_COLUMN_WIDTHS  # Planet names, distance and orbits
 
     # Render table headers
     starting_y = screen.get_height() - 280  # Leave more space below the planet table
@@ -123,3 +199,103 @@ def render_menu_texts(screen, font, clock, total_elapsed_time, planet_data, titl
         orbit_text = f"{planet.orbit_count}"
         orbit_surface = font.render(orbit_text, True, color)
         screen.blit(orbit_surface, (col3_x, row_y))
+
+
+class HudPanel:
+    """A HUD region made of text cells.
+
+    A cell keeps its rendered text and is only rendered again when its text
+    or color changes. Positions are relative to the panel origin.
+    """
+
+    def __init__(self, font, layout):
+        self.font = font
+        self.layout = layout  # Row counts etc., a new layout starts with no cells
+        self.cells = {}  # Cell key -> (text, color, surface, pos)
+
+    def text(self, key, text, color, pos, align_right=False):
+        """Set the text of a cell, returns its rendered surface."""
+        cell = self.cells.get(key)
+        # Right aligned cells store their left edge, so only the row is compared
+        if cell is not None and cell[0] == text and cell[1] == color and cell[3][1] == pos[1]:
+            return cell[2]
+        rendered = self.font.render(text, True, color)
+        if align_right:
+            pos = (pos[0] - rendered.get_width(), pos[1])
+        self.cells[key] = (text, color, rendered, pos)
+        return rendered
+
+    def blit_sequence(self, origin):
+        """(surface, position) pairs of all cells for Surface.blits."""
+        x, y = origin
+        return [(surface, (x + dx, y + dy)) for _, _, surface, (dx, dy) in self.cells.values()]
+
+
+class HudLayer:
+    """The overlays of render_menu_texts() from cached text cells.
+
+    Every corner of the HUD is a HudPanel, so static texts such as the title,
+    the controls and the table headers are rendered once, and per frame only
+    the cells whose text changed are rendered again (usually the FPS, the
+    time and the distances). All cells are drawn with one blits call; the
+    texts are blitted directly, blending whole transparent panels costs more
+    than the text itself.
+    """
+
+    def __init__(self, font):
+        self.font = font
+        self.panels = {}
+
+    def _panel(self, name, layout):
+        panel = self.panels.get(name)
+        if panel is None or panel.layout != layout:
+            # New layout, e.g. another number of rows
+            panel = self.panels[name] = HudPanel(self.font, layout)
+        return panel
+
+    def render(self, screen, clock, total_elapsed_time, planet_data, title=TITLE, navigation_data=None,
+               status_text=None):
+        """Draw the HUD, with the same arguments as render_menu_texts() except the font."""
+        width, height = screen.get_size()
+        color = constants.COLOR_TEXT
+
+        # FPS in the upper left corner
+        fps = self._panel("fps", None)
+        fps.text("fps", "FPS: " + str(int(clock.get_fps())), color, (0, 0))
+
+        # Title, time and optional status line in the upper right corner
+        # Each line 5px below the one above, text heights depend on the letters
+        top = self._panel("top", None)
+        time_y = top.text("title", title, color, (0, 0), align_right=True).get_height() + 5
+        status_y = time_y + top.text("time", format_elapsed_time(total_elapsed_time), color, (0, time_y),
+                                     align_right=True).get_height() + 5
+        top.text("status", status_text or "", color, (0, status_y), align_right=True)
+
+        # Navigation table in the lower left corner, growing upwards with the rows
+        if navigation_data is None:
+            navigation_data = DEFAULT_NAVIGATION
+        nav_col1_width, nav_col2_width = NAV_COLUMN_WIDTHS
+        nav = self._panel("nav", len(navigation_data))
+        nav.text("header1", "Controls", color, (0, 0))
+        nav.text("header2", "Action", color, (nav_col1_width, 0))
+        for i, (control, action) in enumerate(navigation_data):
+            nav.text(("control", i), control, color, (0, 30 + i * 25))
+            nav.text(("action", i), action, color, (nav_col1_width, 30 + i * 25))
+
+        # Planet table in the lower right corner
+        col1_width, col2_width, col3_width = PLANET_COLUMN_WIDTHS
+        table_width = col1_width + col2_width + col3_width
+        planets = self._panel("planets", len(planet_data))
+        for x, header in zip((0, col1_width, col1_width + col2_width), ["Planets", "Distance from the Sun", "Orbits"]):
+            planets.text(("header", x), header, color, (x, 0))
+        for i, (name, planet, planet_color) in enumerate(planet_data):
+            row_y = 30 + i * 25
+            planets.text(("name", i), name, planet_color, (0, row_y))
+            planets.text(("distance", i), f"{round(planet.distance_to_sun / 1000, 1)} km", planet_color,
+                         (col1_width, row_y))
+            planets.text(("orbits", i), f"{planet.orbit_count}", planet_color, (col1_width + col2_width, row_y))
+
+        screen.blits(fps.blit_sequence((15, 15))
+                     + top.blit_sequence((width - 15, 15))
+                     + nav.blit_sequence((15, height - 35 - 25 * len(navigation_data)))
+                     + planets.blit_sequence((width - 30 - table_width, height - 280)), doreturn=False)
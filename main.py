@@ -3,178 +3,486 @@ Solar System Simulation v.1.9
 @author: kuranez
 https://github.com/kuranez/Solar-System-Simulation
 """
+import time
+from solarsystem_profile import StartupProfile, FrameProfile
+
+# Startup is timed in phases, see --startup-profile
+startup_profile = StartupProfile(time.perf_counter())
+
+import argparse
 import constants
+import contextlib
 import math
 import pygame
 import random
 import sys
 from pygame.locals import QUIT
-from solarsystem_scale import calculate_scaled_sizes
-from solarsystem_sim import Body, Sun, Planet, Asteroid
-from solarsystem_creation import create_solarsystem, create_major_asteroids, create_asteroid_belt, create_TNO_belt, create_pluto
-from hud import render_menu_texts
-import datetime  # For screenshot timestamps
+from solarsystem_camera import Camera
+from solarsystem_picking import SpatialHash
+from solarsystem_sim import Body, Sun, Planet, Asteroid, Simulation
+from solarsystem_integrators import INTEGRATORS
+from solarsystem_parallel import SHARDABLE_INTEGRATORS
+from solarsystem_backends import BACKENDS, get_backend
+from solarsystem_render import AsteroidRenderer
+from solarsystem_trails import TrailLayer
+from solarsystem_creation import create_current_solarsystem
+from hud import HudLayer, render_progress, render_frame_profile, render_tooltip
+import datetime  # For screenshot timestamps and --epoch
 
 
-# Initialize pygame
-pygame.init()
+# Command line options
+parser = argparse.ArgumentParser(description="Solar System Simulation")
+parser.add_argument("--integrator", choices=sorted(INTEGRATORS), default=None,
+                    help=f"Integration scheme (default: {constants.DEFAULT_INTEGRATOR}, or the one saved with --resume)")
+parser.add_argument("--mass-threshold", type=float, default=constants.MASSIVE_BODY_THRESHOLD,
+                    help="Minimum mass in kg for a body to attract others (default: %(default)g)")
+parser.add_argument("--self-gravity", action="store_true",
+                    help="Let asteroids and TNOs attract each other (Barnes-Hut tree)")
+parser.add_argument("--opening-angle", type=float, default=constants.BARNES_HUT_OPENING_ANGLE,
+                    help="Barnes-Hut opening angle for --self-gravity (default: %(default)s)")
+parser.add_argument("--kepler", action="store_true",
+                    help="Move asteroids and TNOs on analytic Kepler orbits around the Sun")
+parser.add_argument("--processes", type=int, default=1, metavar="N",
+                    help="Advance asteroids and TNOs on N worker processes (default: %(default)s)")
+parser.add_argument("--backend", choices=sorted(BACKENDS), default=None,
+                    help=f"Compute backend (default: ${constants.BACKEND_ENV_VAR} or {constants.DEFAULT_BACKEND})")
+parser.add_argument("--threaded", action="store_true",
+                    help="Run the physics in a background thread, decoupled from the frame rate")
+parser.add_argument("--sim-rate", type=float, default=None,
+                    help="Physics steps per second in threaded mode (default: as fast as possible)")
+parser.add_argument("--epoch", type=datetime.date.fromisoformat, default=None,
+                    help="Start date of the simulation as YYYY-MM-DD (default: today)")
+parser.add_argument("--startup-profile", action="store_true",
+                    help="Print how long each startup phase took, up to the first frame")
+parser.add_argument("--trace", metavar="PATH",
+                    help="Write the frame phases as Chrome trace-event JSON (chrome://tracing, Perfetto)")
+parser.add_argument("--trace-frames", type=int, default=constants.TRACE_FRAMES, metavar="N",
+                    help="Number of frames written by --trace (default: %(default)s)")
+parser.add_argument("--advance-to", type=datetime.date.fromisoformat, default=None, metavar="YYYY-MM-DD",
+                    help="Fast-forward to this date before the first frame")
+parser.add_argument("--resume", nargs="?", const=constants.CHECKPOINT_PATH, default=None, metavar="PATH",
+                    help="Continue from a checkpoint (default: %(const)s)")
+parser.add_argument("--record", metavar="PATH",
+                    help="Record the positions of every step to a trajectory file for --replay")
+parser.add_argument("--replay", metavar="PATH",
+                    help="Play back a trajectory recording instead of simulating")
+parser.add_argument("--autosave", nargs="?", type=float, const=constants.CHECKPOINT_AUTOSAVE_INTERVAL,
+                    default=None, metavar="SECONDS",
+                    help="Save a checkpoint periodically (default interval: %(const)s s)")
 
-# Window Settings
-DISPLAYSURF = pygame.display.set_mode((constants.WIDTH, constants.HEIGHT), pygame.FULLSCREEN)
-pygame.display.set_caption('Solar System Simulation')
+# Controls shown in the HUD during replays
+REPLAY_NAVIGATION = [
+    ("Mouse Wheel", "Zoom In/Out"),
+    ("[Left Click] + Drag", "Move View"),
+    ("[+] / [-]", "Replay Speed"),
+    ("[Space]", "Pause / Play"),
+    ("[R]", "Reverse"),
+    ("[Left] / [Right]", "Scrub"),
+    ("[Home] / [End]", "Start / End"),
+    ("[ESC]", "Quit Simulation"),
+]
 
-FONT_1 = pygame.font.SysFont(None, 21)
 
-# Clock
-clock = pygame.time.Clock()
-FPS = 60
-dt = 0
+def main():
+    """Parse the command line, create the bodies and run the main loop."""
+    global startup_profile
+    args = parser.parse_args()
+    if args.kepler and args.self_gravity:
+        parser.error("--kepler cannot be combined with --self-gravity")
+    if args.processes > 1 and args.self_gravity:
+        parser.error("--processes cannot be combined with --self-gravity")
+    if args.processes > 1 and not args.replay:
+        integrator = args.integrator
+        if integrator is None and args.resume:
+            from solarsystem_checkpoint import checkpoint_integrator
+            integrator = checkpoint_integrator(args.resume)
+        if (integrator or constants.DEFAULT_INTEGRATOR) not in SHARDABLE_INTEGRATORS:
+            parser.error(f"--processes needs a fixed-step integrator ({', '.join(SHARDABLE_INTEGRATORS)}), "
+                         f"not '{integrator}'")
+    try:
+        get_backend(args.backend)
+    except ValueError as error:
+        parser.error(str(error))
+    startup_profile.mark("imports")
 
-# Scale and Movement Settings
+    # Initialize pygame, only the modules we use (skips the audio mixer)
+    pygame.display.init()
+    pygame.font.init()
 
-# Initial scale factor for the solar system
-scale = constants.DEFAULT_SCALE  # This is the zoom factor for positions
-# How fast zoom in/out should change scale
-zoom_speed = scale * 0.1  # 10 % per scroll step
-screen_offset_x = 0  # Offset for horizontal movement
-screen_offset_y = 0  # Offset for vertical movement
-scaled_sizes = calculate_scaled_sizes(scale)
+    # Window Settings
+    DISPLAYSURF = pygame.display.set_mode((constants.WIDTH, constants.HEIGHT), pygame.FULLSCREEN)
+    pygame.display.set_caption('Solar System Simulation')
 
-# Control Variables
-dragging = False
-drag_start_x, drag_start_y = 0, 0
+    FONT_1 = pygame.font.SysFont(None, 21)
+    hud_layer = HudLayer(FONT_1)  # HUD texts, rendered again only when they change
+    startup_profile.mark("display init")
 
-# Time tracking
-simulation_start_time = 0  # Will be set when simulation starts
-total_elapsed_time = 0  # Total simulated time in seconds
+    # Clock
+    clock = pygame.time.Clock()
+    FPS = 60
+    dt = 0
 
-# Solar System Creation
+    # Scale and Movement Settings
 
-# Create solar system 
-solarsystem = create_solarsystem()
+    # Zoom and pan offsets are kept by the Camera, created with the bodies below
 
-# Assign individual planet variables
-sun, mercury, venus, earth, mars, jupiter, saturn, uranus, neptune = solarsystem
+    # Control Variables
+    dragging = False
+    drag_start_x, drag_start_y = 0, 0
+    press_x, press_y = 0, 0  # Where the left button went down, to tell clicks from drags
 
-# Create major asteroids (Ceres and Vesta)
-major_asteroids = create_major_asteroids()
+    # Solar System Creation
 
-# Create asteroid belt
-asteroids = create_asteroid_belt(num_asteroids=300)
+    # Create solar system 
+    resumed = None
+    replay = None
+    if args.replay:
+        # Replays draw recorded frames, the bodies are saved next to the recording
+        from solarsystem_recording import Replay, bodies_path
+        replay = Replay(args.replay)
+        args.resume = bodies_path(args.replay)
+        args.threaded = False
 
-# Create TNOs
-tno_belt = create_TNO_belt(num_objects=100)
-pluto = create_pluto()
+    if args.resume:
+        # Continue a saved simulation, all bodies come from the checkpoint
+        from solarsystem_checkpoint import load_checkpoint
+        current_solarsystem, resumed = load_checkpoint(args.resume)
+    else:
+        # Planets, major asteroids, asteroid belt, TNOs and Pluto
+        current_solarsystem = create_current_solarsystem(epoch=args.epoch)
+    startup_profile.mark("ephemeris")
 
-# Current Solar System (combine all bodies)
-current_solarsystem = solarsystem + major_asteroids + asteroids + tno_belt + [pluto]
+    # Assign individual planet variables
+    named_bodies = {body.name: body for body in current_solarsystem if isinstance(body, (Sun, Planet))}
+    sun, mercury, venus, earth, mars, jupiter, saturn, uranus, neptune, pluto = (
+        named_bodies[name] for name in
+        ("Sun", "Mercury", "Venus", "Earth", "Mars", "Jupiter", "Saturn", "Uranus", "Neptune", "Pluto"))
 
-planet_hud_data = [
-    ("Mercury", mercury, constants.COLOR_MERCURY),
-    ("Venus", venus, constants.COLOR_VENUS),
-    ("Earth", earth, constants.COLOR_EARTH),
-    ("Mars", mars, constants.COLOR_MARS),
-    ("Jupiter", jupiter, constants.COLOR_JUPITER),
-    ("Saturn", saturn, constants.COLOR_SATURN),
-    ("Uranus", uranus, constants.COLOR_URANUS),
-    ("Neptune", neptune, constants.COLOR_NEPTUNE),
-    ("Pluto", pluto, constants.COLOR_PLUTO)
-]
+    # Asteroids and TNOs are drawn as one point cloud, all other bodies draw themselves
+    asteroid_renderer = AsteroidRenderer([body for body in current_solarsystem if isinstance(body, Asteroid)])
+    drawn_bodies = [body for body in current_solarsystem if not isinstance(body, Asteroid)]
+    trail_layer = TrailLayer(drawn_bodies)  # Kept between frames, also clears the screen
+    camera = Camera(drawn_bodies)  # Zoom, pan and the screen positions of all bodies
+
+    # Picking: click selects a body, F follows it, hovering shows a tooltip
+    spatial_hash = SpatialHash()  # Rebuilt from the projected positions in frames with the cursor on the window
+    bodies_by_index = {body.index: body for body in current_solarsystem}
+    selected_body = None
+    hovered_body = None
+
+
+    def pick_body(x, y):
+        """The body under the screen point (x, y), or None."""
+        # Planets and the Sun by their drawn size, the topmost first
+        for body in reversed(drawn_bodies):
+            bx, by = camera.screen[body.index]
+            if math.hypot(bx - x, by - y) <= max(body.radius, constants.PICK_RADIUS):
+                return body
+        index = spatial_hash.query(x, y)
+        return bodies_by_index.get(index) if index is not None else None
+
+
+    def describe_body(body):
+        """Tooltip lines for a body."""
+        name = f"{body.name} #{body.index}" if isinstance(body, Asteroid) else body.name
+        lines = [name, f"{body.distance_to_sun / constants.AU:.3f} AU from the Sun"]
+        if replay is None:  # Replays only have positions
+            lines.append(f"{math.hypot(body.x_vel, body.y_vel) / 1000:.2f} km/s")
+        return lines
+
+
+    # Physics driver (also tracks the total simulated time)
+    integrator = args.integrator or (resumed["integrator"] if resumed else constants.DEFAULT_INTEGRATOR)
+    simulation = Simulation(current_solarsystem, integrator=integrator, mass_threshold=args.mass_threshold,
+                            self_gravity=args.self_gravity, opening_angle=args.opening_angle, kepler=args.kepler,
+                            processes=args.processes if replay is None else 1, backend=args.backend)
+    if resumed:
+        simulation.elapsed_time = resumed["elapsed_time"]
+        simulation.step_count = resumed["step_count"]
+    if args.record and replay is None:
+        from solarsystem_recording import TrajectoryRecorder
+        simulation.recorder = TrajectoryRecorder(args.record, simulation)
+
+
+    def fast_forward(years=None, date=None):
+        """Run the simulation ahead off-screen with a progress bar."""
+        def show_progress(fraction):
+            # Keep the window responsive while the simulation runs ahead
+            pygame.event.pump()
+            DISPLAYSURF.fill(constants.COLOR_BACKGROUND)
+            render_progress(DISPLAYSURF, FONT_1, fraction, f"Fast-forwarding {label}  {100 * fraction:.0f} %")
+            pygame.display.update()
+
+        if date is not None:
+            label = f"to {date:%Y-%m-%d}"
+            simulation.advance_to(date, progress=show_progress)
+        else:
+            label = f"{years:g} years"
+            simulation.advance(years * 365.25 * 24 * 3600, progress=show_progress)
+
+
+    if args.advance_to and replay is None:
+        fast_forward(date=args.advance_to)
+
+    # Optional background physics thread, the main loop then only draws snapshots
+    worker = None
+    if args.threaded:
+        from solarsystem_worker import SimulationWorker
+        worker = SimulationWorker(simulation, steps_per_second=args.sim_rate)
+        worker.start()
+    startup_profile.mark("population")
+
+
+    def quit_simulation():
+        """Stop the physics worker and close the window."""
+        if worker is not None:
+            worker.stop()
+        if simulation.recorder is not None:
+            simulation.recorder.close()
+        simulation.close()
+        if checkpoint_thread is not None:
+            checkpoint_thread.join()  # Let a running save finish
+        if args.trace and not trace_saved:
+            save_trace()  # The frames traced so far
+        pygame.quit()
+        sys.exit()
+
+
+    # Frame phase timings, shown with F3 and written by --trace
+    frame_profile = FrameProfile(trace_frames=args.trace_frames if args.trace else 0)
+    show_frame_profile = False
+    trace_saved = False
+
+
+    def save_trace():
+        nonlocal trace_saved
+        frame_profile.write_trace(args.trace)
+        trace_saved = True
+        print(f"Trace of {min(frame_profile.frames, args.trace_frames)} frames saved to: {args.trace}")
+
+
+    # Checkpoints (F5 and --autosave), written in the background
+    checkpoint_thread = None
+    last_autosave = time.perf_counter()
+
+
+    def save_simulation(path=constants.CHECKPOINT_PATH):
+        """Write a checkpoint unless the previous one is still being written."""
+        nonlocal checkpoint_thread
+        if checkpoint_thread is not None and checkpoint_thread.is_alive():
+            return False
+        from solarsystem_checkpoint import save_checkpoint
+        # Collect a consistent state, the physics thread must not step meanwhile
+        with worker.paused() if worker is not None else contextlib.nullcontext():
+            checkpoint_thread = save_checkpoint(path, simulation, background=True)
+        return True
+
+
+    planet_hud_data = [
+        ("Mercury", mercury, constants.COLOR_MERCURY),
+        ("Venus", venus, constants.COLOR_VENUS),
+        ("Earth", earth, constants.COLOR_EARTH),
+        ("Mars", mars, constants.COLOR_MARS),
+        ("Jupiter", jupiter, constants.COLOR_JUPITER),
+        ("Saturn", saturn, constants.COLOR_SATURN),
+        ("Uranus", uranus, constants.COLOR_URANUS),
+        ("Neptune", neptune, constants.COLOR_NEPTUNE),
+        ("Pluto", pluto, constants.COLOR_PLUTO)
+    ]
+
+    # Main Loop
+    while True:
+        frame_profile.start_frame()
+        clock.tick(FPS)
+        frame_profile.mark("wait")
+
+        for event in pygame.event.get():
+            if event.type == QUIT:
+                quit_simulation()
+
+            # Mouse events for zooming
+            if event.type == pygame.MOUSEWHEEL:
+                # Use event.y to determine the scroll direction
+                # Positive value means scroll up (zoom in), negative means scroll down (zoom out)
+                # The camera keeps the scale in ZOOM_LIMITS and rescales the planet sizes
+                if event.y:
+                    camera.zoom(1 if event.y > 0 else -1)
+
+            # Mouse dragging events
+            elif event.type == pygame.MOUSEBUTTONDOWN:
+                if event.button == 1:  # Left mouse button
+                    dragging = True
+                    drag_start_x, drag_start_y = pygame.mouse.get_pos()
+                    press_x, press_y = drag_start_x, drag_start_y
+            elif event.type == pygame.MOUSEBUTTONUP:
+                if event.button == 1:  # Left mouse button
+                    dragging = False
+                    # Without moving the mouse it is a click: select the body under the cursor
+                    release_x, release_y = pygame.mouse.get_pos()
+                    if max(abs(release_x - press_x), abs(release_y - press_y)) <= constants.CLICK_TOLERANCE:
+                        selected_body = pick_body(release_x, release_y)
+                        if camera.following is not None:
+                            camera.follow(selected_body.index if selected_body else None)
+            elif event.type == pygame.MOUSEMOTION:
+                if dragging:
+                    # Get the current mouse position
+                    current_x, current_y = pygame.mouse.get_pos()
+                    # Calculate the difference from the start position
+                    dx = current_x - drag_start_x
+                    dy = current_y - drag_start_y
+                    # Update the screen offsets based on the mouse movement
+                    camera.pan(dx, dy)
+                    # Update the drag start position for the next motion event
+                    drag_start_x, drag_start_y = current_x, current_y
+
+            # Keyboard events for speed control
+            if event.type == pygame.KEYDOWN:
+                # Adjust simulation speed using [+] or [-] from both regular keys and numpad
+                if replay is not None:
+                    # Replay controls: speed, pause, direction and scrubbing
+                    if event.key == pygame.K_PLUS or event.key == pygame.K_EQUALS or event.key == pygame.K_KP_PLUS:
+                        replay.speed *= 2
+                    elif event.key == pygame.K_MINUS or event.key == pygame.K_KP_MINUS:
+                        replay.speed /= 2
+                    elif event.key == pygame.K_SPACE:
+                        replay.toggle()
+                    elif event.key == pygame.K_r:
+                        replay.reverse()
+                    elif event.key == pygame.K_RIGHT:
+                        replay.seek(replay.cursor + len(replay) * constants.REPLAY_SCRUB_FRACTION)
+                    elif event.key == pygame.K_LEFT:
+                        replay.seek(replay.cursor - len(replay) * constants.REPLAY_SCRUB_FRACTION)
+                    elif event.key == pygame.K_HOME:
+                        replay.seek(0)
+                    elif event.key == pygame.K_END:
+                        replay.seek(len(replay) - 1)
+                elif event.key == pygame.K_PLUS or event.key == pygame.K_EQUALS or event.key == pygame.K_KP_PLUS:
+                    Body.TIMESTEP += 3600 * 24  # Increase time step (faster)
+                elif event.key == pygame.K_MINUS or event.key == pygame.K_KP_MINUS:
+                    Body.TIMESTEP -= 3600 * 24  # Decrease time step (slower)
+
+                # # Check mouse position for screen movement (for future use)
+                # mouse_x, mouse_y = pygame.mouse.get_pos()  # Get current mouse position
+                # if mouse_x <= 10:  # If mouse is at the left edge
+                #     camera.pan(5, 0)
+                # elif mouse_x >= constants.WIDTH - 10:  # If mouse is at the right edge
+                #     camera.pan(-5, 0)
+                # if mouse_y <= 10:  # If mouse is at the top edge
+                #     camera.pan(0, 5)
+                # elif mouse_y >= constants.HEIGHT - 10:  # If mouse is at the bottom edge
+                #     camera.pan(0, -5)
+
+                # Exit the program with ESC
+                if event.key == pygame.K_ESCAPE:
+                    quit_simulation()
+
+                # Take screenshot with F12 key
+                if event.key == pygame.K_F12:
+                    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+                    screenshot_path = f"screenshots/solar_system_{timestamp}.png"
+                    pygame.image.save(DISPLAYSURF, screenshot_path)
+                    print(f"Screenshot saved to: {screenshot_path}")
+
+                # Fast-forward with J, the physics thread waits meanwhile
+                if event.key == pygame.K_j and replay is None:
+                    with worker.paused() if worker is not None else contextlib.nullcontext():
+                        fast_forward(years=constants.FAST_FORWARD_YEARS)
+                    clock.tick()  # Do not count the jump as frame time
+
+                # Follow the selected body with F, again to stop
+                if event.key == pygame.K_f and selected_body is not None:
+                    following = camera.following == selected_body.index
+                    camera.follow(None if following else selected_body.index)
+
+                # Show or hide the frame profile with F3
+                if event.key == pygame.K_F3:
+                    show_frame_profile = not show_frame_profile
+
+                # Save a checkpoint with F5, continue later with --resume
+                if event.key == pygame.K_F5 and replay is None:
+                    if save_simulation():
+                        print(f"Checkpoint saved to: {constants.CHECKPOINT_PATH}")
+
+        if args.autosave and replay is None and time.perf_counter() - last_autosave >= args.autosave:
+            save_simulation()
+            last_autosave = time.perf_counter()
+        frame_profile.mark("events")
+
+        # Update Solar System, all bodies at once
+        if replay is not None:
+            # Draw a recorded frame, nothing is simulated
+            frame = replay.advance()
+            simulation.state.snapshot = replay.positions[frame]
+            elapsed_time = float(replay.times[frame])
+            replay.update_trails(drawn_bodies, frame)
+        elif worker is None:
+            simulation.step()
+            elapsed_time = simulation.elapsed_time
+        else:
+            # Draw the latest state published by the physics thread
+            snapshot = worker.latest()
+            simulation.state.snapshot = snapshot.pos
+            snapshot.tracked.record()  # Trails and orbit counters live on this thread
+            elapsed_time = snapshot.elapsed_time
+        frame_profile.mark("physics")
+
+        # Draw Solar System, new sizes. The trail layer covers the whole screen
+        screen = camera.update()  # Project all bodies at once
+        trail_layer.draw(DISPLAYSURF, camera.scale, camera.offset_x, camera.offset_y)
+        for body in drawn_bodies:
+            body.draw(DISPLAYSURF, camera.scale, camera.offset_x, camera.offset_y, with_trail=False,
+                      position=screen[body.index])
+        frame_profile.mark("trails")
+        asteroid_renderer.draw(DISPLAYSURF, camera.scale, camera.offset_x, camera.offset_y, screen=screen)
+        frame_profile.mark("asteroids")
+
+        # Mark the selected body, find the one under the cursor
+        if selected_body is not None:
+            x, y = screen[selected_body.index]
+            ring_radius = max(int(selected_body.radius), 2) + 5
+            pygame.draw.circle(DISPLAYSURF, constants.COLOR_TEXT, (int(x), int(y)), ring_radius, 1)
+        hovered_body = None
+        if pygame.mouse.get_focused():
+            spatial_hash.build(screen)
+            if not dragging:
+                hovered_body = pick_body(*pygame.mouse.get_pos())
+        frame_profile.mark("picking")
+
+        # Render menu texts and planet distances
+        if replay is None:
+            selection_status = None
+            if selected_body is not None:
+                following = camera.following == selected_body.index
+                selection_status = f"{'Following' if following else 'Selected'}: {describe_body(selected_body)[0]}"
+            hud_layer.render(DISPLAYSURF, clock, elapsed_time, planet_hud_data, status_text=selection_status)
+        else:
+            replay_status = (f"Replay: frame {replay.frame + 1}/{len(replay)}  {replay.direction * replay.speed:g}x"
+                             + ("" if replay.playing else "  (paused)"))
+            hud_layer.render(DISPLAYSURF, clock, elapsed_time, planet_hud_data,
+                             navigation_data=REPLAY_NAVIGATION, status_text=replay_status)
+        if hovered_body is not None:
+            render_tooltip(DISPLAYSURF, FONT_1, describe_body(hovered_body), pygame.mouse.get_pos())
+        if show_frame_profile:
+            render_frame_profile(DISPLAYSURF, FONT_1, frame_profile.stats(), frame_profile.frame_times, 1000 / FPS)
+        frame_profile.mark("hud")
+
+        # delta time for framerate-independent physics
+        dt = clock.tick(FPS) / 1000
+        frame_profile.mark("wait")
+
+        # Update display
+        pygame.display.update()
+        frame_profile.mark("display")
+        frame_profile.end_frame()
+        if args.trace and not trace_saved and frame_profile.trace_complete:
+            save_trace()
+
+        if startup_profile is not None:
+            startup_profile.mark("first frame")
+            if args.startup_profile:
+                print(startup_profile.report())
+            startup_profile = None
 
-# Main Loop
-while True:
-    clock.tick(FPS)
-    DISPLAYSURF.fill(constants.COLOR_BACKGROUND)
-
-    for event in pygame.event.get():
-        if event.type == QUIT:
-            pygame.quit()
-            sys.exit()
-
-        # Mouse events for zooming
-        if event.type == pygame.MOUSEWHEEL:
-            # Use event.y to determine the scroll direction
-            # Positive value means scroll up (zoom in), negative means scroll down (zoom out)
-            if event.y > 0:
-                scale *= 1.1  # Zoom in (increase scale)
-            elif event.y < 0:
-                scale /= 1.1  # Zoom out (decrease scale)
-            # Ensure scale is within a reasonable range (not too small or too large)
-            scale = max(constants.DEFAULT_SCALE * 0.05, min(scale, constants.DEFAULT_SCALE * 10))
-            # Recalculate planet sizes for new scale
-            scaled_sizes = calculate_scaled_sizes(scale)
-            # Update each planet's radius
-            for body in current_solarsystem:
-                if hasattr(body, "name") and body.name in scaled_sizes:
-                    body.radius = scaled_sizes[body.name]
-        
-        # Mouse dragging events
-        elif event.type == pygame.MOUSEBUTTONDOWN:
-            if event.button == 1:  # Left mouse button
-                dragging = True
-                drag_start_x, drag_start_y = pygame.mouse.get_pos()
-        elif event.type == pygame.MOUSEBUTTONUP:
-            if event.button == 1:  # Left mouse button
-                dragging = False
-        elif event.type == pygame.MOUSEMOTION:
-            if dragging:
-                # Get the current mouse position
-                current_x, current_y = pygame.mouse.get_pos()
-                # Calculate the difference from the start position
-                dx = current_x - drag_start_x
-                dy = current_y - drag_start_y
-                # Update the screen offsets based on the mouse movement
-                screen_offset_x += dx
-                screen_offset_y += dy
-                # Update the drag start position for the next motion event
-                drag_start_x, drag_start_y = current_x, current_y
-
-        # Keyboard events for speed control
-        if event.type == pygame.KEYDOWN:
-            # Adjust simulation speed using [+] or [-] from both regular keys and numpad
-            if event.key == pygame.K_PLUS or event.key == pygame.K_EQUALS or event.key == pygame.K_KP_PLUS:
-                Body.TIMESTEP += 3600 * 24  # Increase time step (faster)
-            elif event.key == pygame.K_MINUS or event.key == pygame.K_KP_MINUS:
-                Body.TIMESTEP -= 3600 * 24  # Decrease time step (slower)
-
-            # # Check mouse position for screen movement (for future use)
-            # mouse_x, mouse_y = pygame.mouse.get_pos()  # Get current mouse position
-            # if mouse_x <= 10:  # If mouse is at the left edge
-            #     screen_offset_x += 5
-            # elif mouse_x >= constants.WIDTH - 10:  # If mouse is at the right edge
-            #     screen_offset_x -= 5
-            # if mouse_y <= 10:  # If mouse is at the top edge
-            #     screen_offset_y += 5
-            # elif mouse_y >= constants.HEIGHT - 10:  # If mouse is at the bottom edge
-            #     screen_offset_y -= 5
-
-            # Exit the program with ESC
-            if event.key == pygame.K_ESCAPE:
-                pygame.quit()
-                sys.exit()
-            
-            # Take screenshot with F12 key
-            if event.key == pygame.K_F12:
-                timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-                screenshot_path = f"screenshots/solar_system_{timestamp}.png"
-                pygame.image.save(DISPLAYSURF, screenshot_path)
-                print(f"Screenshot saved to: {screenshot_path}")
-
-    # Draw and update Solar System, new sizes
-    for body in current_solarsystem:
-        body.update_position(current_solarsystem)
-        body.draw(DISPLAYSURF, scale, screen_offset_x, screen_offset_y)
-    
-    # Update total elapsed simulation time
-    total_elapsed_time += Body.TIMESTEP
-
-    # Render menu texts and planet distances
-    render_menu_texts(DISPLAYSURF, FONT_1, clock, total_elapsed_time, planet_hud_data)
-
-    # delta time for framerate-independent physics
-    dt = clock.tick(FPS) / 1000
-    
-
-    # Update display
-    pygame.display.update()
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+# solarsystem_backends.py
+"""
+Interchangeable compute backends for the physics kernels.
+
+A backend provides the two kernels all physics goes through:
+
+- accelerations(points, sources, gm): pull of point masses on a set of
+  points, used by GravityEngine for the massive bodies and every integrated
+  test particle (also in the worker processes of --processes), and thereby
+  by all integrators.
+- solve_kepler(mean_anomaly, e, guess=None, ...): Kepler's equation for
+  the analytic test-particle orbits of --kepler.
+
+Backends are registered by name in BACKENDS and chosen with --backend or the
+SOLARSYSTEM_BACKEND environment variable. `python -m solarsystem_sim parity`
+checks every available backend against "reference".
+"""
+import math
+import os
+
+import constants
+import numpy as np
+from solarsystem_kepler import solve_kepler, starting_guess
+
+# Number of target bodies handled per broadcast block, keeps the
+# temporary (targets, sources, 2) arrays small for very large belts
+CHUNK_SIZE = 32768
+
+
+class ReferenceBackend:
+    """Pure Python loops with the trigonometry of Body.attraction.
+
+    Slow, but a direct transcription of the original physics that the
+    faster backends are checked against.
+    """
+
+    name = "reference"
+
+    def accelerations(self, points, sources, gm):
+        acc = np.zeros((len(points), 2))
+        sources = [(float(x), float(y), float(g)) for (x, y), g in zip(sources, gm)]
+        for i, (x, y) in enumerate(points.tolist()):
+            total_ax = total_ay = 0.0
+            for source_x, source_y, g in sources:
+                distance_x = source_x - x
+                distance_y = source_y - y
+                distance = math.sqrt(distance_x**2 + distance_y**2)
+                # A body does not attract itself
+                if distance == 0:
+                    continue
+                a = g / distance**2
+                theta = math.atan2(distance_y, distance_x)
+                total_ax += math.cos(theta) * a
+                total_ay += math.sin(theta) * a
+            acc[i] = total_ax, total_ay
+        return acc
+
+    def solve_kepler(self, mean_anomaly, e, guess=None, tolerance=constants.KEPLER_TOLERANCE,
+                     max_iterations=constants.KEPLER_MAX_ITERATIONS):
+        if guess is None:
+            guess = starting_guess(mean_anomaly, e)
+        E = np.empty(len(mean_anomaly))
+        for i, (M, ecc, anomaly) in enumerate(zip(mean_anomaly.tolist(), e.tolist(), np.asarray(guess).tolist())):
+            for _ in range(max_iterations):
+                delta = (anomaly - ecc * math.sin(anomaly) - M) / (1 - ecc * math.cos(anomaly))
+                anomaly -= delta
+                if abs(delta) < tolerance:
+                    break
+            E[i] = anomaly
+        return E
+
+
+class NumpyBackend:
+    """Broadcasts over blocks of targets with NumPy, the default."""
+
+    name = "numpy"
+
+    def accelerations(self, points, sources, gm):
+        acc = np.empty_like(points)
+        for start in range(0, len(points), CHUNK_SIZE):
+            block = points[start:start + CHUNK_SIZE]
+            # Separation vectors from each target to each source
+            d = sources[np.newaxis, :, :] - block[:, np.newaxis, :]
+            r2 = np.einsum("kmj,kmj->km", d, d)
+            # A body does not attract itself
+            r2[r2 == 0.0] = np.inf
+            weights = gm / (r2 * np.sqrt(r2))
+            acc[start:start + CHUNK_SIZE] = np.einsum("kmj,km->kj", d, weights)
+        return acc
+
+    def solve_kepler(self, mean_anomaly, e, guess=None, tolerance=constants.KEPLER_TOLERANCE,
+                     max_iterations=constants.KEPLER_MAX_ITERATIONS):
+        return solve_kepler(mean_anomaly, e, guess, tolerance, max_iterations)
+
+
+def _numba_kernels():
+    """Compile the Numba kernels, raises ImportError without Numba."""
+    # Deferred import, Numba is optional
+    import numba
+
+    @numba.njit(parallel=True, cache=True)
+    def accelerations(points, sources, gm):
+        acc = np.zeros((points.shape[0], 2))
+        for i in numba.prange(points.shape[0]):
+            ax = 0.0
+            ay = 0.0
+            for j in range(sources.shape[0]):
+                dx = sources[j, 0] - points[i, 0]
+                dy = sources[j, 1] - points[i, 1]
+                r2 = dx * dx + dy * dy
+                if r2 > 0.0:
+                    weight = gm[j] / (r2 * math.sqrt(r2))
+                    ax += dx * weight
+                    ay += dy * weight
+            acc[i, 0] = ax
+            acc[i, 1] = ay
+        return acc
+
+    @numba.njit(parallel=True, cache=True)
+    def solve(mean_anomaly, e, guess, tolerance, max_iterations):
+        E = np.empty(mean_anomaly.shape[0])
+        for i in numba.prange(mean_anomaly.shape[0]):
+            anomaly = guess[i]
+            for _ in range(max_iterations):
+                delta = (anomaly - e[i] * math.sin(anomaly) - mean_anomaly[i]) / (1 - e[i] * math.cos(anomaly))
+                anomaly -= delta
+                if abs(delta) < tolerance:
+                    break
+            E[i] = anomaly
+        return E
+
+    return accelerations, solve
+
+
+class NumbaBackend:
+    """JIT-compiled loops, parallel over the targets. Needs the numba package."""
+
+    name = "numba"
+
+    def __init__(self):
+        self._accelerations, self._solve_kepler = _numba_kernels()
+        # Compile now (or load from the cache) rather than in the first step
+        self._accelerations(np.zeros((1, 2)), np.zeros((1, 2)), np.zeros(1))
+        self._solve_kepler(np.zeros(1), np.zeros(1), np.zeros(1), constants.KEPLER_TOLERANCE, 1)
+
+    def accelerations(self, points, sources, gm):
+        return self._accelerations(points, sources, gm)
+
+    def solve_kepler(self, mean_anomaly, e, guess=None, tolerance=constants.KEPLER_TOLERANCE,
+                     max_iterations=constants.KEPLER_MAX_ITERATIONS):
+        if guess is None:
+            guess = starting_guess(mean_anomaly, e)
+        return self._solve_kepler(mean_anomaly, e, np.asarray(guess, dtype=np.float64), tolerance, max_iterations)
+
+
+# Backends selectable by name
+BACKENDS = {
+    "reference": ReferenceBackend,
+    "numpy": NumpyBackend,
+    "numba": NumbaBackend,
+}
+
+# Backends created so far, the Numba kernels are only compiled once
+_instances = {}
+
+
+def get_backend(name=None):
+    """Look up a compute backend by name.
+
+    Without a name, the SOLARSYSTEM_BACKEND environment variable or
+    constants.DEFAULT_BACKEND is used.
+    """
+    name = name or os.environ.get(constants.BACKEND_ENV_VAR) or constants.DEFAULT_BACKEND
+    if name not in _instances:
+        try:
+            backend = BACKENDS[name]
+        except KeyError:
+            raise ValueError(f"Unknown backend '{name}', choose from: {', '.join(BACKENDS)}") from None
+        try:
+            _instances[name] = backend()
+        except ImportError as error:
+            raise ValueError(f"Backend '{name}' is not available: {error}") from error
+    return _instances[name]
+
+
+def available_backends():
+    """Names of the backends that can be used in this environment."""
+    names = []
+    for name in BACKENDS:
+        try:
+            get_backend(name)
+        except ValueError:
+            continue
+        names.append(name)
+    return names
@@ -0,0 +1,167 @@
+# solarsystem_barneshut.py
+
+import constants
+import numpy as np
+
+# Depth of the quadtree, positions are quantized to a 2**16 x 2**16 grid
+MORTON_BITS = 16
+
+# Number of targets walked through the tree at once, bounds memory use
+WALK_CHUNK = 4096
+
+
+def _spread_bits(v):
+    """Insert a zero bit between each of the lower 16 bits of `v`."""
+    v = v & np.uint64(0xFFFF)
+    v = (v | (v << np.uint64(8))) & np.uint64(0x00FF00FF)
+    v = (v | (v << np.uint64(4))) & np.uint64(0x0F0F0F0F)
+    v = (v | (v << np.uint64(2))) & np.uint64(0x33333333)
+    v = (v | (v << np.uint64(1))) & np.uint64(0x55555555)
+    return v
+
+
+class _Level:
+    """All nodes of one tree level, stored as arrays."""
+
+    def __init__(self, start, end, mass, com, x0, y0, size, leaf):
+        self.start = start  # Range of the node's particles in Morton order
+        self.end = end
+        self.mass = mass
+        self.com = com  # Center of mass
+        self.x0 = x0  # Lower corner of the node's cell
+        self.y0 = y0
+        self.size = size  # Cell edge length, the same for all nodes of a level
+        # Distance of the center of mass from the cell center
+        self.offset = np.hypot(com[:, 0] - (x0 + size / 2), com[:, 1] - (y0 + size / 2))
+        self.leaf = leaf
+        self.child_start = None  # Range of the children in the next level
+        self.child_end = None
+
+
+class QuadTree:
+    """2D Barnes-Hut quadtree over a set of source particles.
+
+    The tree is built in O(N log N) from sorted Morton codes: the nodes of a
+    level are the runs of equal code prefixes, so every level is computed
+    with a few vectorized reductions. The force walk is vectorized as well,
+    moving all (target, node) pairs of a level through the tree together.
+    """
+
+    def __init__(self, pos, mass, opening_angle=constants.BARNES_HUT_OPENING_ANGLE,
+                 leaf_size=constants.BARNES_HUT_LEAF_SIZE, softening=constants.BARNES_HUT_SOFTENING):
+        self.opening_angle = opening_angle
+        self.softening2 = softening * softening
+
+        # Square root cell around all particles
+        lo = pos.min(axis=0)
+        size = max(float((pos.max(axis=0) - lo).max()), 1.0) * (1 + 1e-9)
+        cells = 1 << MORTON_BITS
+        grid = np.clip(((pos - lo) / size * cells).astype(np.int64), 0, cells - 1).astype(np.uint64)
+        codes = _spread_bits(grid[:, 0]) | (_spread_bits(grid[:, 1]) << np.uint64(1))
+
+        order = np.argsort(codes, kind="stable")
+        codes = codes[order]
+        grid = grid[order].astype(np.int64)
+        self.pos = pos[order]
+        self.mass = mass[order]
+        weighted = self.pos * self.mass[:, np.newaxis]
+
+        self.levels = []
+        for depth in range(MORTON_BITS + 1):
+            prefix = codes >> np.uint64(2 * (MORTON_BITS - depth))
+            start = np.flatnonzero(np.concatenate(([True], prefix[1:] != prefix[:-1])))
+            end = np.append(start[1:], len(codes))
+
+            node_mass = np.add.reduceat(self.mass, start)
+            com = np.add.reduceat(weighted, start) / node_mass[:, np.newaxis]
+            cell_size = size / (1 << depth)
+            shift = MORTON_BITS - depth
+            x0 = lo[0] + (grid[start, 0] >> shift) * cell_size
+            y0 = lo[1] + (grid[start, 1] >> shift) * cell_size
+            leaf = (end - start <= leaf_size) | (depth == MORTON_BITS)
+
+            level = _Level(start, end, node_mass, com, x0, y0, cell_size, leaf)
+            if self.levels:
+                parent = self.levels[-1]
+                parent.child_start = np.searchsorted(start, parent.start)
+                parent.child_end = np.searchsorted(start, parent.end)
+            self.levels.append(level)
+            if leaf.all():
+                break
+
+    def accelerations(self, targets):
+        """Accelerations at the (K, 2) positions `targets` due to all particles."""
+        acc = np.zeros_like(targets)
+        for begin in range(0, len(targets), WALK_CHUNK):
+            block = targets[begin:begin + WALK_CHUNK]
+            acc[begin:begin + WALK_CHUNK] = self._walk(block)
+        return acc
+
+    def _walk(self, targets):
+        count = len(targets)
+        ax = np.zeros(count)
+        ay = np.zeros(count)
+        theta = self.opening_angle
+
+        # Every target starts at the root node
+        pair_target = np.arange(count)
+        pair_node = np.zeros(count, dtype=np.int64)
+
+        for level in self.levels:
+            if not len(pair_target):
+                break
+            p = targets[pair_target]
+            d = level.com[pair_node] - p
+            r2 = np.einsum("ij,ij->i", d, d)
+
+            # Nodes that are far enough away act as a single point mass,
+            # a node containing the target is always opened. The distance is
+            # measured from the center of mass, which can sit near a corner of
+            # the cell, so its offset from the cell center is added to the
+            # size/theta limit; otherwise a target next to a lopsided cell
+            # sees it as a point mass far too early.
+            inside = ((p[:, 0] >= level.x0[pair_node]) & (p[:, 0] < level.x0[pair_node] + level.size)
+                      & (p[:, 1] >= level.y0[pair_node]) & (p[:, 1] < level.y0[pair_node] + level.size))
+            limit = level.size / theta + level.offset[pair_node]
+            far = ~inside & (limit * limit < r2)
+            self._accumulate(ax, ay, pair_target[far], d[far], r2[far], level.mass[pair_node[far]])
+
+            # Leaves that are too close are summed particle by particle
+            near = ~far
+            direct = near & level.leaf[pair_node]
+            if direct.any():
+                direct_target = pair_target[direct]
+                direct_node = pair_node[direct]
+                counts = level.end[direct_node] - level.start[direct_node]
+                targets_rep, sources = _expand(direct_target, level.start[direct_node], counts)
+                d = self.pos[sources] - targets[targets_rep]
+                r2 = np.einsum("ij,ij->i", d, d)
+                # A particle's own contribution vanishes since d is zero
+                self._accumulate(ax, ay, targets_rep, d, r2, self.mass[sources])
+
+            # Open the remaining nodes into their children
+            opened = near & ~level.leaf[pair_node]
+            if not opened.any():
+                break
+            opened_node = pair_node[opened]
+            counts = level.child_end[opened_node] - level.child_start[opened_node]
+            pair_target, pair_node = _expand(pair_target[opened], level.child_start[opened_node], counts)
+
+        return np.column_stack((ax, ay))
+
+    def _accumulate(self, ax, ay, target, d, r2, mass):
+        """Add G m d / (r^2 + eps^2)^1.5 to the accelerations of `target`."""
+        if not len(target):
+            return
+        r2 = r2 + self.softening2
+        weight = constants.G * mass / (r2 * np.sqrt(r2))
+        ax += np.bincount(target, weights=d[:, 0] * weight, minlength=len(ax))
+        ay += np.bincount(target, weights=d[:, 1] * weight, minlength=len(ay))
+
+
+def _expand(owner, first, counts):
+    """Repeat `owner` counts times, paired with first, first + 1, ... first + count - 1."""
+    offsets = np.cumsum(counts) - counts
+    owner_rep = np.repeat(owner, counts)
+    index = np.repeat(first - offsets, counts) + np.arange(counts.sum())
+    return owner_rep, index
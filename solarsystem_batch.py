@@ -0,0 +1,300 @@
+# solarsystem_batch.py
+"""
+Headless batch runs without a display.
+
+Usage:
+    python -m solarsystem_sim run --years 1000 --output states.npz
+    python -m solarsystem_sim parity --steps 200
+"""
+import argparse
+import datetime
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+import zipfile
+
+import constants
+import numpy as np
+from solarsystem_backends import BACKENDS, available_backends, get_backend
+from solarsystem_checkpoint import checkpoint_integrator, load_checkpoint, save_checkpoint
+from solarsystem_creation import create_current_solarsystem
+from solarsystem_integrators import INTEGRATORS
+from solarsystem_parallel import SHARDABLE_INTEGRATORS
+from solarsystem_recording import TrajectoryRecorder
+from solarsystem_sim import Body, Planet, Simulation
+from solarsystem_state import StateStore
+
+SECONDS_PER_YEAR = 365.25 * 24 * 3600
+SECONDS_PER_DAY = 24 * 3600
+
+
+class SampleArchive:
+    """Sampled states streamed to disk and packed into an .npz archive at the end.
+
+    Times, positions and velocities go to memory-mapped .npy files in a
+    temporary directory next to `path` as the run progresses, so a long run
+    does not hold its samples in memory. close() stores them uncompressed in
+    the archive together with the per-body arrays, which np.load reads like
+    any .npz file.
+    """
+
+    def __init__(self, path, num_samples, count):
+        self.path = path
+        self._directory = tempfile.TemporaryDirectory(prefix=".samples-",
+                                                      dir=os.path.dirname(os.path.abspath(path)))
+        shapes = {"time": (num_samples,), "pos": (num_samples, count, 2), "vel": (num_samples, count, 2)}
+        self.arrays = {
+            name: np.lib.format.open_memmap(os.path.join(self._directory.name, name + ".npy"), mode="w+",
+                                            dtype=np.float64, shape=shape)
+            for name, shape in shapes.items()
+        }
+
+    def write(self, i, elapsed_time, positions, velocities):
+        """Store sample `i`."""
+        self.arrays["time"][i] = elapsed_time
+        self.arrays["pos"][i] = positions
+        self.arrays["vel"][i] = velocities
+
+    def close(self, extra):
+        """Write the archive with the samples and the arrays in `extra`, then remove the temporary files."""
+        with zipfile.ZipFile(self.path, "w", allowZip64=True) as archive:
+            for name, array in self.arrays.items():
+                array.flush()
+                archive.write(array.filename, name + ".npy")
+            for name, value in extra.items():
+                with archive.open(name + ".npy", "w", force_zip64=True) as member:
+                    np.lib.format.write_array(member, np.asanyarray(value))
+        self.discard()
+
+    def discard(self):
+        """Remove the temporary files without writing the archive."""
+        self.arrays.clear()
+        self._directory.cleanup()
+
+
+def run_batch(years, output=None, sample_days=30.0, timestep_days=constants.TIMESTEP / SECONDS_PER_DAY,
+              integrator=None, mass_threshold=constants.MASSIVE_BODY_THRESHOLD,
+              num_asteroids=300, num_tno_objects=100, seed=None, self_gravity=False,
+              opening_angle=constants.BARNES_HUT_OPENING_ANGLE, epoch=None, resume=None, checkpoint=None,
+              record=None, record_every=1, kepler=False, processes=1, backend=None):
+    """Advance a freshly created system for `years` and return run statistics.
+
+    If `output` is given, states are sampled every `sample_days` of simulated
+    time (rounded to whole steps) and streamed to an .npz archive there.
+    With `resume` the run continues from a checkpoint instead, with the
+    integrator it was saved with unless `integrator` is given (default:
+    constants.DEFAULT_INTEGRATOR), and the final
+    state is saved to `checkpoint` if a path is given. With `record` every
+    `record_every`-th step is written to a trajectory file for replays.
+    With `processes` above one, the test particles are sharded across that
+    many worker processes. `backend` names the compute backend.
+    """
+    if seed is not None:
+        random.seed(seed)
+
+    if resume:
+        bodies, resumed = load_checkpoint(resume)
+    else:
+        bodies = create_current_solarsystem(num_asteroids=num_asteroids, num_tno_objects=num_tno_objects,
+                                            epoch=epoch)
+    integrator = integrator or (resumed["integrator"] if resume else constants.DEFAULT_INTEGRATOR)
+    simulation = Simulation(bodies, integrator=integrator, mass_threshold=mass_threshold,
+                            self_gravity=self_gravity, opening_angle=opening_angle, kepler=kepler,
+                            processes=processes, backend=backend)
+    if resume:
+        simulation.elapsed_time = resumed["elapsed_time"]
+        simulation.step_count = resumed["step_count"]
+    if record:
+        simulation.recorder = TrajectoryRecorder(record, simulation, every=record_every)
+    state = simulation.state
+
+    dt = timestep_days * SECONDS_PER_DAY
+    total_steps = math.ceil(years * SECONDS_PER_YEAR / dt)
+    sample_every = max(1, round(sample_days * SECONDS_PER_DAY / dt))
+    num_samples = total_steps // sample_every + 1
+
+    archive = SampleArchive(output, num_samples, state.count) if output else None
+
+    def sample(i):
+        if archive is not None:
+            archive.write(i, simulation.elapsed_time, state.positions, state.velocities)
+
+    sample(0)
+    print(f"Running {years} years: {total_steps} steps of {timestep_days:g} days, "
+          f"{state.count} bodies, integrator '{integrator}', backend '{simulation.backend.name}'")
+
+    start = time.perf_counter()
+    report_every = max(1, total_steps // 10)
+    try:
+        for step in range(1, total_steps + 1):
+            simulation.step(dt)
+            if step % sample_every == 0:
+                sample(step // sample_every)
+            if step % report_every == 0:
+                print(f"  {100 * step / total_steps:5.1f} %  ({simulation.elapsed_time / SECONDS_PER_YEAR:.1f} years)")
+    except BaseException:
+        if archive is not None:
+            archive.discard()
+        raise
+    finally:
+        simulation.close()
+    wall_time = time.perf_counter() - start
+
+    steps_per_second = total_steps / wall_time if wall_time > 0 else float("inf")
+    print(f"Done in {wall_time:.2f} s: {steps_per_second:,.0f} steps/s, "
+          f"{steps_per_second * state.count:,.0f} body-steps/s")
+
+    if archive is not None:
+        archive.close({
+            "mass": state.masses,
+            "kind": state.kinds,
+            "name": np.array([getattr(body, "name", "") for body in bodies]),
+            "timestep": np.float64(dt),
+            "epoch": np.array(state.epoch.isoformat() if state.epoch else ""),
+        })
+        print(f"{num_samples} states saved to: {output}")
+    if checkpoint:
+        save_checkpoint(checkpoint, simulation)
+        print(f"Checkpoint saved to: {checkpoint}")
+    if record:
+        simulation.recorder.close()
+        print(f"Trajectory of {simulation.recorder.frames} frames recorded to: {record}")
+    return {"steps": total_steps, "samples": num_samples if output else 0, "wall_time": wall_time}
+
+
+def check_parity(backends=None, steps=100, integrator=constants.DEFAULT_INTEGRATOR, num_asteroids=200,
+                 num_tno_objects=50, seed=1, epoch=None, kepler=False,
+                 tolerance=constants.BACKEND_PARITY_TOLERANCE):
+    """Run the same system on each backend and compare it with "reference".
+
+    Every backend (default: all available) advances an identical system for
+    `steps` steps. Returns {name: largest position difference in AU} and
+    prints a table; a backend passes if the difference is below `tolerance`.
+    """
+    backends = backends or [name for name in available_backends() if name != "reference"]
+    final = {}
+    timings = {}
+    for name in ["reference"] + [name for name in backends if name != "reference"]:
+        random.seed(seed)
+        Body.STATE = StateStore()
+        bodies = create_current_solarsystem(num_asteroids=num_asteroids, num_tno_objects=num_tno_objects,
+                                            epoch=epoch)
+        simulation = Simulation(bodies, integrator=integrator, kepler=kepler, backend=name)
+        start = time.perf_counter()
+        for _ in range(steps):
+            simulation.step()
+        timings[name] = (time.perf_counter() - start) / steps
+        final[name] = simulation.state.positions.copy()
+
+    reference = final["reference"]
+    errors = {}
+    print(f"{steps} steps of {Body.TIMESTEP / SECONDS_PER_DAY:g} days, {len(reference)} bodies, "
+          f"integrator '{integrator}'{', Kepler' if kepler else ''}")
+    print(f"  {'backend':<10} {'ms/step':>9} {'max error (AU)':>15}")
+    for name, positions in final.items():
+        errors[name] = float(np.hypot(*(positions - reference).T).max()) / constants.AU
+        status = "ok" if errors[name] <= tolerance else "FAILED"
+        print(f"  {name:<10} {timings[name] * 1000:9.2f} {errors[name]:15.3g}  {status}")
+    return errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m solarsystem_sim",
+                                     description="Solar System Simulation batch runs")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Advance the system headless and save sampled states")
+    run_parser.add_argument("--years", type=float, required=True, help="Simulated time span in years")
+    run_parser.add_argument("--output", help="Write sampled states to this .npz file")
+    run_parser.add_argument("--sample-days", type=float, default=30.0,
+                            help="Sampling cadence in simulated days (default: %(default)s)")
+    run_parser.add_argument("--timestep-days", type=float, default=constants.TIMESTEP / SECONDS_PER_DAY,
+                            help="Integration time step in days (default: %(default)s)")
+    run_parser.add_argument("--integrator", choices=sorted(INTEGRATORS), default=None,
+                            help=f"Integration scheme (default: {constants.DEFAULT_INTEGRATOR}, "
+                                 "or the one saved with --resume)")
+    run_parser.add_argument("--mass-threshold", type=float, default=constants.MASSIVE_BODY_THRESHOLD,
+                            help="Minimum mass in kg for a body to attract others (default: %(default)g)")
+    run_parser.add_argument("--self-gravity", action="store_true",
+                            help="Let asteroids and TNOs attract each other (Barnes-Hut tree)")
+    run_parser.add_argument("--opening-angle", type=float, default=constants.BARNES_HUT_OPENING_ANGLE,
+                            help="Barnes-Hut opening angle for --self-gravity (default: %(default)s)")
+    run_parser.add_argument("--kepler", action="store_true",
+                            help="Move asteroids and TNOs on analytic Kepler orbits around the Sun")
+    run_parser.add_argument("--processes", type=int, default=1, metavar="N",
+                            help="Advance asteroids and TNOs on N worker processes (default: %(default)s)")
+    run_parser.add_argument("--backend", choices=sorted(BACKENDS), default=None,
+                            help=f"Compute backend (default: ${constants.BACKEND_ENV_VAR} or {constants.DEFAULT_BACKEND})")
+    run_parser.add_argument("--asteroids", type=int, default=300, help="Number of belt asteroids")
+    run_parser.add_argument("--tnos", type=int, default=100, help="Number of trans-Neptunian objects")
+    run_parser.add_argument("--seed", type=int, help="Random seed for the generated populations")
+    run_parser.add_argument("--epoch", type=datetime.date.fromisoformat, default=None,
+                            help="Start date as YYYY-MM-DD (default: today)")
+    run_parser.add_argument("--resume", metavar="PATH", help="Continue from a checkpoint instead of a new system")
+    run_parser.add_argument("--checkpoint", metavar="PATH", help="Save a checkpoint of the final state")
+    run_parser.add_argument("--record", metavar="PATH", help="Record a trajectory file for python main.py --replay")
+    run_parser.add_argument("--record-every", type=int, default=1,
+                            help="Record every N-th step (default: %(default)s)")
+
+    parity_parser = subparsers.add_parser("parity", help="Compare the compute backends with the reference backend")
+    parity_parser.add_argument("--backends", nargs="+", choices=sorted(BACKENDS),
+                               help="Backends to check (default: all available)")
+    parity_parser.add_argument("--steps", type=int, default=100, help="Steps to compare (default: %(default)s)")
+    parity_parser.add_argument("--integrator", choices=sorted(INTEGRATORS), default=constants.DEFAULT_INTEGRATOR,
+                               help="Integration scheme (default: %(default)s)")
+    parity_parser.add_argument("--kepler", action="store_true", help="Also compare the Kepler solver")
+    parity_parser.add_argument("--asteroids", type=int, default=200, help="Number of belt asteroids")
+    parity_parser.add_argument("--tnos", type=int, default=50, help="Number of trans-Neptunian objects")
+    parity_parser.add_argument("--tolerance", type=float, default=constants.BACKEND_PARITY_TOLERANCE,
+                               help="Largest allowed position difference in AU (default: %(default)g)")
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        for option, value in (("--years", args.years), ("--sample-days", args.sample_days),
+                              ("--timestep-days", args.timestep_days)):
+            if not value > 0:
+                run_parser.error(f"{option} must be positive, got {value:g}")
+    if args.command == "run" and args.kepler and args.self_gravity:
+        run_parser.error("--kepler cannot be combined with --self-gravity")
+    if args.command == "run" and args.processes > 1 and args.self_gravity:
+        run_parser.error("--processes cannot be combined with --self-gravity")
+    if args.command == "run" and args.processes > 1:
+        integrator = args.integrator
+        if integrator is None and args.resume:
+            integrator = checkpoint_integrator(args.resume)
+        if (integrator or constants.DEFAULT_INTEGRATOR) not in SHARDABLE_INTEGRATORS:
+            run_parser.error(f"--processes needs a fixed-step integrator ({', '.join(SHARDABLE_INTEGRATORS)}), "
+                             f"not '{integrator}'")
+    # Fail early if a requested backend is not installed
+    requested = (args.backends or [None]) if args.command == "parity" else [args.backend]
+    try:
+        for backend in requested:
+            get_backend(backend)
+    except ValueError as error:
+        parser.error(str(error))
+
+    if args.command == "run":
+        # Keep the console readable on long runs
+        Planet.PRINT_ORBITS = False
+        Body.TIMESTEP = args.timestep_days * SECONDS_PER_DAY
+        run_batch(args.years, output=args.output, sample_days=args.sample_days,
+                  timestep_days=args.timestep_days, integrator=args.integrator,
+                  mass_threshold=args.mass_threshold, num_asteroids=args.asteroids,
+                  num_tno_objects=args.tnos, seed=args.seed, self_gravity=args.self_gravity,
+                  opening_angle=args.opening_angle, epoch=args.epoch,
+                  resume=args.resume, checkpoint=args.checkpoint, record=args.record,
+                  record_every=args.record_every, kepler=args.kepler, processes=args.processes,
+                  backend=args.backend)
+    elif args.command == "parity":
+        Planet.PRINT_ORBITS = False
+        errors = check_parity(args.backends, steps=args.steps, integrator=args.integrator,
+                              num_asteroids=args.asteroids, num_tno_objects=args.tnos, kepler=args.kepler,
+                              tolerance=args.tolerance)
+        if any(error > args.tolerance for error in errors.values()):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+# solarsystem_benchmark.py
+"""
+Headless benchmark suite (pygame's dummy video driver, no window).
+
+Times physics steps, asteroid drawing, trail drawing, HUD rendering, picking
+and a complete frame while the body count, trail length and zoom level are swept.
+Results are written as JSON; with --compare they are checked against a
+stored baseline and slower medians are reported as regressions:
+
+    python solarsystem_benchmark.py --output baseline.json
+    python solarsystem_benchmark.py --output after.json --compare baseline.json
+"""
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+
+import constants
+import numpy as np
+
+# Runs only measure the first few calls of very slow cases
+MAX_RUNS = 1000
+
+# Bodies in the HUD planet table of main.py
+HUD_PLANETS = ("Mercury", "Venus", "Earth", "Mars", "Jupiter", "Saturn", "Uranus", "Neptune", "Pluto")
+
+
+def measure(function, min_time=constants.BENCHMARK_MIN_TIME, min_runs=3):
+    """Call `function` repeatedly and return its timing statistics in ms.
+
+    One untimed call warms up caches first, then it runs at least
+    `min_runs` times and until `min_time` seconds have been spent.
+    """
+    function()
+    times = []
+    start = time.perf_counter()
+    while len(times) < min_runs or (time.perf_counter() - start < min_time and len(times) < MAX_RUNS):
+        t0 = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - t0)
+    times = np.array(times) * 1000
+    return {
+        "runs": len(times),
+        "median_ms": float(np.median(times)),
+        "min_ms": float(times.min()),
+        "p95_ms": float(np.percentile(times, 95)),
+    }
+
+
+def result_key(result):
+    """Identify a result by its name and parameters, e.g. "trail.draw length=1000 zoom=1"."""
+    params = " ".join(f"{name}={value}" if isinstance(value, int) else f"{name}={value:g}"
+                      for name, value in sorted(result["params"].items()))
+    return f"{result['name']} {params}".strip()
+
+
+class BenchmarkSuite:
+    """Builds the systems to benchmark and collects the results."""
+
+    def __init__(self, body_counts=constants.BENCHMARK_BODY_COUNTS, trail_lengths=constants.BENCHMARK_TRAIL_LENGTHS,
+                 zoom_levels=constants.BENCHMARK_ZOOM_LEVELS, min_time=constants.BENCHMARK_MIN_TIME,
+                 integrator=constants.DEFAULT_INTEGRATOR, backend=None, epoch=None, seed=1):
+        self.body_counts = body_counts
+        self.trail_lengths = trail_lengths
+        self.zoom_levels = zoom_levels
+        self.min_time = min_time
+        self.integrator = integrator
+        self.backend = backend
+        self.epoch = epoch
+        self.seed = seed
+        self.results = []
+        self._base_count = None  # Bodies of a system without asteroids and TNOs
+
+        # Deferred imports, the video driver has to be chosen before pygame starts
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        import pygame
+        pygame.display.init()
+        pygame.font.init()
+        self.pygame = pygame
+        self.surface = pygame.display.set_mode((constants.WIDTH, constants.HEIGHT))
+        self.font = pygame.font.SysFont(None, 21)
+        self.clock = pygame.time.Clock()
+
+    def record(self, name, function, **params):
+        result = {"name": name, "params": params, **measure(function, self.min_time)}
+        self.results.append(result)
+        print(f"  {result_key(result):<40} {result['median_ms']:10.3f} ms  ({result['runs']} runs)")
+        return result
+
+    def build(self, count):
+        """A fresh system of `count` bodies: planets and major bodies plus a 3:1 asteroid/TNO mix."""
+        from solarsystem_creation import create_current_solarsystem
+        from solarsystem_sim import Body, Simulation
+        from solarsystem_state import StateStore
+
+        if self._base_count is None:
+            Body.STATE = StateStore()
+            self._base_count = len(create_current_solarsystem(num_asteroids=0, num_tno_objects=0, epoch=self.epoch))
+        particles = max(count - self._base_count, 0)
+
+        random.seed(self.seed)
+        Body.STATE = StateStore(capacity=max(count, 1))
+        bodies = create_current_solarsystem(num_asteroids=particles - particles // 4,
+                                            num_tno_objects=particles // 4, epoch=self.epoch)
+        return bodies, Simulation(bodies, integrator=self.integrator, backend=self.backend)
+
+    def run(self):
+        from hud import HudLayer, render_menu_texts
+        from solarsystem_camera import Camera
+        from solarsystem_picking import SpatialHash
+        from solarsystem_render import AsteroidRenderer
+        from solarsystem_sim import Asteroid, Planet
+        from solarsystem_trails import TrailLayer
+
+        Planet.PRINT_ORBITS = False
+        surface = self.surface
+
+        for count in self.body_counts:
+            print(f"{count} bodies")
+            bodies, simulation = self.build(count)
+            asteroids = [body for body in bodies if isinstance(body, Asteroid)]
+            drawn = [body for body in bodies if not isinstance(body, Asteroid)]
+            renderer = AsteroidRenderer(asteroids)
+            planet_data = [(body.name, body, body.color) for body in drawn if getattr(body, "name", "") in HUD_PLANETS]
+            hud_layer = HudLayer(self.font)
+            trail_layer = TrailLayer(drawn)
+            camera = Camera(drawn)
+
+            self.record("physics.step", simulation.step, bodies=count)
+            for zoom in self.zoom_levels:
+                scale = constants.DEFAULT_SCALE * zoom
+                self.record("asteroids.draw", lambda: renderer.draw(surface, scale), bodies=count, zoom=zoom)
+
+            def frame():
+                # As in the main loop, the trail layer also clears the screen
+                simulation.step()
+                screen = camera.update()
+                trail_layer.draw(surface, camera.scale)
+                for body in drawn:
+                    body.draw(surface, camera.scale, with_trail=False, position=screen[body.index])
+                renderer.draw(surface, camera.scale, screen=screen)
+                hud_layer.render(surface, self.clock, simulation.elapsed_time, planet_data)
+
+            self.record("frame", frame, bodies=count)
+
+            # Rebuilding the picking grid and one hover lookup, as in every frame with the cursor on the window
+            spatial_hash = SpatialHash()
+
+            def pick():
+                spatial_hash.build(camera.update())
+                spatial_hash.query(constants.WIDTH / 2 + 100, constants.HEIGHT / 2)
+
+            self.record("picking", pick, bodies=count)
+            if count == self.body_counts[0]:
+                self.record("hud.render", lambda: render_menu_texts(surface, self.font, self.clock,
+                                                                   simulation.elapsed_time, planet_data))
+                self.record("hud.layer", lambda: hud_layer.render(surface, self.clock, simulation.elapsed_time,
+                                                                  planet_data))
+            simulation.close()
+            del bodies, simulation, asteroids, drawn, renderer, planet_data, hud_layer, trail_layer, camera, spatial_hash
+
+        # Trails of the Earth, one simulated day per point as in the main loop
+        bodies, simulation = self.build(0)
+        earth = next(body for body in bodies if getattr(body, "name", "") == "Earth")
+        radius = earth.distance_to_sun
+        day_angle = 2 * math.pi / 365.25
+        for length in self.trail_lengths:
+            earth.set_trail_length(length)
+            angles = np.arange(length) * day_angle
+            earth.orbit.extend(np.column_stack((radius * np.cos(angles), radius * np.sin(angles))))
+            next_angle = [length * day_angle]
+
+            def draw_trail():
+                # Every frame adds one point, like Simulation.step
+                earth.orbit.append(radius * math.cos(next_angle[0]), radius * math.sin(next_angle[0]))
+                next_angle[0] += day_angle
+                earth.draw(surface, scale)
+
+            for zoom in self.zoom_levels:
+                scale = constants.DEFAULT_SCALE * zoom
+                self.record("trail.draw", draw_trail, length=length, zoom=zoom)
+
+            # The same with a persistent trail layer, including its periodic redraws
+            layer = TrailLayer([earth])
+
+            def draw_layer():
+                earth.orbit.append(radius * math.cos(next_angle[0]), radius * math.sin(next_angle[0]))
+                next_angle[0] += day_angle
+                layer.draw(surface, constants.DEFAULT_SCALE)
+                earth.draw(surface, constants.DEFAULT_SCALE, with_trail=False)
+
+            self.record("trail.layer", draw_layer, length=length)
+        return self.results
+
+    def metadata(self):
+        return {
+            "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pygame": self.pygame.version.ver,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "integrator": self.integrator,
+            "backend": self.backend or os.environ.get(constants.BACKEND_ENV_VAR) or constants.DEFAULT_BACKEND,
+        }
+
+
+def compare(results, baseline, threshold=constants.BENCHMARK_REGRESSION_THRESHOLD,
+            noise_floor=constants.BENCHMARK_NOISE_FLOOR):
+    """Print the change of every median against `baseline` and return the regressed keys.
+
+    A change counts if it is larger than `threshold` (relative) and
+    `noise_floor` (ms), so sub-millisecond timings do not raise false alarms.
+    """
+    previous = {result_key(result): result for result in baseline}
+    regressions = []
+    print(f"{'benchmark':<40} {'baseline':>10} {'now':>10} {'change':>8}")
+    for result in results:
+        key = result_key(result)
+        if key not in previous:
+            print(f"{key:<40} {'-':>10} {result['median_ms']:10.3f}      new")
+            continue
+        before = previous[key]["median_ms"]
+        change = result["median_ms"] / before - 1 if before > 0 else 0.0
+        status = ""
+        if abs(result["median_ms"] - before) > noise_floor:
+            if change > threshold:
+                status = "REGRESSION"
+                regressions.append(key)
+            elif change < -threshold:
+                status = "faster"
+        print(f"{key:<40} {before:10.3f} {result['median_ms']:10.3f} {100 * change:+7.1f}%  {status}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless performance benchmarks")
+    parser.add_argument("--bodies", type=int, nargs="+", default=list(constants.BENCHMARK_BODY_COUNTS),
+                        help="Body counts to sweep (default: %(default)s)")
+    parser.add_argument("--trail-lengths", type=int, nargs="+", default=list(constants.BENCHMARK_TRAIL_LENGTHS),
+                        help="Trail lengths to sweep (default: %(default)s)")
+    parser.add_argument("--zoom", type=float, nargs="+", default=list(constants.BENCHMARK_ZOOM_LEVELS),
+                        help="Zoom levels as multiples of the default scale (default: %(default)s)")
+    parser.add_argument("--quick", action="store_true", help="Only body counts up to 40000 and shorter measurements")
+    parser.add_argument("--min-time", type=float, default=constants.BENCHMARK_MIN_TIME,
+                        help="Seconds spent on each measurement (default: %(default)s)")
+    parser.add_argument("--integrator", default=constants.DEFAULT_INTEGRATOR,
+                        help="Integration scheme (default: %(default)s)")
+    parser.add_argument("--backend", default=None, help="Compute backend (default: as for main.py)")
+    parser.add_argument("--epoch", type=datetime.date.fromisoformat, default=None,
+                        help="Start date as YYYY-MM-DD, pin it for comparable runs (default: today)")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", metavar="BASELINE", help="Compare with the results in a baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=constants.BENCHMARK_REGRESSION_THRESHOLD,
+                        help="Relative slowdown of the median reported as a regression (default: %(default)s)")
+    args = parser.parse_args()
+    if args.quick:
+        args.bodies = [count for count in args.bodies if count <= 40000]
+        args.min_time = min(args.min_time, 0.1)
+
+    suite = BenchmarkSuite(body_counts=args.bodies, trail_lengths=args.trail_lengths, zoom_levels=args.zoom,
+                           min_time=args.min_time, integrator=args.integrator, backend=args.backend,
+                           epoch=args.epoch)
+    results = suite.run()
+    report = {"meta": suite.metadata(), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=1)
+        print(f"Results saved to: {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nCompared with {args.compare} ({baseline['meta']['date']}):")
+        regressions = compare(results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) above {100 * args.threshold:.0f} %")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# solarsystem_camera.py
+
+import constants
+import numpy as np
+from solarsystem_scale import calculate_scaled_sizes
+
+
+class Camera:
+    """View transform from simulation meters to screen pixels.
+
+    Holds the zoom (`scale`, pixels per meter) and the pan offset, and
+    projects the rendered positions of all bodies with one array operation
+    per frame. Planet sizes are linear in the zoom, so the store indices of
+    the sized bodies and their sizes at DEFAULT_SCALE are collected once and
+    a zoom step rescales them with a single multiplication. With follow(),
+    the pan offset keeps one body at the screen center.
+    """
+
+    def __init__(self, bodies, scale=constants.DEFAULT_SCALE, offset_x=0, offset_y=0):
+        sizes = calculate_scaled_sizes(constants.DEFAULT_SCALE)
+        sized = [body for body in bodies if getattr(body, "name", None) in sizes]
+        self._state = bodies[0]._state if bodies else None
+        self.sized = np.array([body.index for body in sized], dtype=np.int64)
+        self.base_radii = np.array([sizes[body.name] for body in sized])
+
+        self.scale = scale
+        self.offset_x = offset_x
+        self.offset_y = offset_y
+        self.following = None  # Store index of the body kept at the screen center
+        self.screen = np.zeros((0, 2))  # Screen positions of all bodies, updated by update()
+        self._rescale()
+
+    def _rescale(self):
+        if len(self.sized):
+            self._state.radius[self.sized] = self.base_radii * (self.scale / constants.DEFAULT_SCALE)
+
+    def zoom(self, steps):
+        """Zoom in (positive) or out (negative) by mouse wheel steps, within ZOOM_LIMITS."""
+        low, high = constants.ZOOM_LIMITS
+        scale = self.scale * constants.ZOOM_STEP ** steps
+        self.scale = max(constants.DEFAULT_SCALE * low, min(scale, constants.DEFAULT_SCALE * high))
+        self._rescale()
+
+    def pan(self, dx, dy):
+        """Move the view by (dx, dy) pixels, which stops following a body."""
+        self.offset_x += dx
+        self.offset_y += dy
+        if dx or dy:
+            self.following = None
+
+    def follow(self, index):
+        """Keep the body with this store index at the screen center (None stops)."""
+        self.following = index
+
+    @property
+    def center(self):
+        """Screen position of the simulation origin."""
+        return constants.WIDTH / 2 + self.offset_x, constants.HEIGHT / 2 + self.offset_y
+
+    def project(self, positions, out=None):
+        """Screen coordinates of an (N, 2) array of positions in meters."""
+        screen = np.multiply(positions, self.scale, out=out)
+        screen += self.center
+        return screen
+
+    def update(self):
+        """Project the rendered positions of all bodies, once per frame."""
+        if self._state is not None:
+            positions = self._state.render_positions
+            if self.following is not None:
+                # Whole pixels keep the trail layer aligned with the bodies
+                self.offset_x = -round(positions[self.following, 0] * self.scale)
+                self.offset_y = -round(positions[self.following, 1] * self.scale)
+            # Reuse the array of the previous frame while the body count is unchanged
+            out = self.screen if self.screen.shape == positions.shape else None
+            self.screen = self.project(positions, out)
+        return self.screen
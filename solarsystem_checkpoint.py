@@ -0,0 +1,165 @@
+# solarsystem_checkpoint.py
+"""
+Save and resume the complete simulation state.
+
+A checkpoint is a single uncompressed .npz archive holding the state store
+arrays, the orbit trails and orbit counters of all tracked bodies, the
+Python RNG state, Body.TIMESTEP, the simulated time and the epoch. Loading
+rebuilds the Body objects directly from the archive, nothing is recomputed.
+"""
+import datetime
+import os
+import random
+import threading
+
+import numpy as np
+from solarsystem_state import StateStore, KIND_SUN, KIND_PLANET, KIND_ASTEROID
+from solarsystem_sim import Body, Sun, Planet, Asteroid
+
+# Increase when the archive layout changes
+CHECKPOINT_VERSION = 1
+
+
+def checkpoint_arrays(simulation):
+    """Collect the simulation state as a dict of arrays (copies).
+
+    This is the only part that has to run while the simulation is paused,
+    the result can be written from another thread.
+    """
+    state = simulation.state
+    bodies = simulation.bodies
+    count = state.count
+
+    # Trails of all bodies that have one, concatenated
+    trail_bodies = [body for body in simulation.tracked_bodies if body.orbit.capacity]
+    trails = [body.orbit.ordered() for body in trail_bodies]
+
+    # Orbit counting fields of planets (including dwarf planets and major asteroids)
+    planets = [body for body in bodies if isinstance(body, Planet)]
+
+    rng_version, rng_internal, rng_gauss = random.getstate()
+
+    return {
+        "version": np.int64(CHECKPOINT_VERSION),
+        "pos": state.positions.copy(),
+        "vel": state.velocities.copy(),
+        "mass": state.masses.copy(),
+        "radius": state.radii.copy(),
+        "kind": state.kinds.copy(),
+        "flags": state.flags[:count].copy(),
+        "name": np.array([getattr(body, "name", "") for body in bodies]),
+        "color": np.array([body.color for body in bodies], dtype=np.uint8).reshape(count, 3),
+        "trail_index": np.array([body.index for body in trail_bodies], dtype=np.int64),
+        "trail_capacity": np.array([body.orbit.capacity for body in trail_bodies], dtype=np.int64),
+        "trail_total": np.array([body.orbit.total for body in trail_bodies], dtype=np.int64),
+        "trail_size": np.array([len(points) for points in trails], dtype=np.int64),
+        "trail_points": np.concatenate(trails) if trails else np.zeros((0, 2), dtype=np.float32),
+        "orbit_index": np.array([body.index for body in planets], dtype=np.int64),
+        "orbit_count": np.array([body.orbit_count for body in planets], dtype=np.int64),
+        "orbit_angle": np.array([[body.accumulated_angle, body.previous_angle] for body in planets]).reshape(-1, 2),
+        "orbit_prev": np.array([[body.prev_x, body.prev_y] for body in planets]).reshape(-1, 2),
+        "flash_timer": np.array([body.flash_timer for body in planets], dtype=np.int64),
+        "rng_state": np.array(rng_internal, dtype=np.int64),
+        "rng_version": np.int64(rng_version),
+        "rng_gauss": np.float64(np.nan if rng_gauss is None else rng_gauss),
+        "timestep": np.float64(Body.TIMESTEP),
+        "elapsed_time": np.float64(simulation.elapsed_time),
+        "step_count": np.int64(simulation.step_count),
+        "integrator": np.array(simulation.integrator_name),
+        "epoch": np.array(state.epoch.isoformat() if state.epoch else ""),
+    }
+
+
+def write_checkpoint(path, arrays):
+    # Write to a temporary file first so an interrupted save keeps the old checkpoint
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(temp_path, path)
+
+
+def save_checkpoint(path, simulation, background=False):
+    """Write a checkpoint of `simulation` to `path`.
+
+    With `background` the file is written by a daemon thread, which is
+    returned, so periodic saves do not stall the frame loop.
+    """
+    arrays = checkpoint_arrays(simulation)
+    if not background:
+        write_checkpoint(path, arrays)
+        return None
+    thread = threading.Thread(target=write_checkpoint, args=(path, arrays), daemon=True)
+    thread.start()
+    return thread
+
+
+def checkpoint_integrator(path):
+    """Name of the integrator a checkpoint was saved with, without loading the bodies."""
+    with np.load(path) as data:
+        return str(data["integrator"])
+
+
+def load_checkpoint(path):
+    """Rebuild the bodies saved in a checkpoint.
+
+    A new Body.STATE is created and filled, Body.TIMESTEP and the RNG state
+    are restored. Returns (bodies, info), where info holds the simulated
+    time, step count, integrator name and epoch to resume the Simulation with.
+    """
+    with np.load(path) as data:
+        version = int(data["version"])
+        if version != CHECKPOINT_VERSION:
+            raise ValueError(f"Checkpoint {path} has version {version}, expected {CHECKPOINT_VERSION}")
+        saved = {key: data[key] for key in data.files}
+
+    count = len(saved["mass"])
+    Body.STATE = StateStore(capacity=max(count, 1))
+
+    bodies = []
+    for kind, name, color, (x, y), radius, mass in zip(saved["kind"], saved["name"], saved["color"],
+                                                         saved["pos"], saved["radius"], saved["mass"]):
+        if kind == KIND_SUN:
+            body = Sun(x, y, radius, mass)
+        elif kind == KIND_PLANET:
+            body = Planet(x, y, radius, mass, name=str(name))
+        elif kind == KIND_ASTEROID:
+            body = Asteroid(x, y, radius, mass)
+        else:
+            body = Body(x, y, radius, mass)
+        body.color = tuple(int(c) for c in color)
+        bodies.append(body)
+
+    # Bulk restore of the state arrays, including the flags reset by the constructors
+    state = Body.STATE
+    state.pos[:count] = saved["pos"]
+    state.vel[:count] = saved["vel"]
+    state.flags[:count] = saved["flags"]
+    state.epoch = datetime.date.fromisoformat(str(saved["epoch"])) if str(saved["epoch"]) else None
+
+    offsets = np.cumsum(saved["trail_size"]) - saved["trail_size"]
+    for index, capacity, total, offset, size in zip(saved["trail_index"], saved["trail_capacity"],
+                                                    saved["trail_total"], offsets, saved["trail_size"]):
+        body = bodies[index]
+        if body.orbit.capacity != capacity:
+            body.set_trail_length(int(capacity))
+        body.orbit.restore(saved["trail_points"][offset:offset + size], int(total))
+
+    for i, index in enumerate(saved["orbit_index"]):
+        planet = bodies[index]
+        planet.orbit_count = int(saved["orbit_count"][i])
+        planet.accumulated_angle, planet.previous_angle = (float(v) for v in saved["orbit_angle"][i])
+        planet.prev_x, planet.prev_y = (float(v) for v in saved["orbit_prev"][i])
+        planet.flash_timer = int(saved["flash_timer"][i])
+
+    gauss = float(saved["rng_gauss"])
+    random.setstate((int(saved["rng_version"]), tuple(int(v) for v in saved["rng_state"]),
+                     None if np.isnan(gauss) else gauss))
+    Body.TIMESTEP = float(saved["timestep"])
+
+    info = {
+        "elapsed_time": float(saved["elapsed_time"]),
+        "step_count": int(saved["step_count"]),
+        "integrator": str(saved["integrator"]),
+        "epoch": state.epoch,
+    }
+    return bodies, info
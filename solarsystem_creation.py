@@ -5,68 +5,34 @@ import random
 import math
 from solarsystem_sim import Body, Sun, Planet, Asteroid
 from solarsystem_scale import calculate_scaled_sizes
-from skyfield.api import load, EarthSatellite
-from skyfield.timelib import Time
+from solarsystem_ephemeris import state_vectors
 
-def create_solarsystem():
-    """Create objects in the solar system using Skyfield for real positions."""
+def create_solarsystem(epoch=None):
+    """Create objects in the solar system using JPL ephemerides for real positions.
+
+    State vectors for the epoch (a date, default today) come from the local
+    ephemeris cache, Skyfield is only loaded if the epoch is not cached.
+    """
     # Use the default simulation scale for initial planet rendering sizes.
     scaled_sizes = calculate_scaled_sizes(constants.DEFAULT_SCALE)
 
-    # Load Skyfield data
-    # Use most recent DE440s ephemeris for accurate planetary positions
-    eph = load('de440s.bsp')
-    # Load timescale and get current time
-    ts = load.timescale()
-    # Set time to now for current positions, or you can set it to a specific date/time
-    t = ts.now()
+    # Planet positions and velocities in meters and m/s
+    epoch, vectors = state_vectors(epoch)
+    Body.STATE.epoch = epoch
 
-    # Get the Sun object from Skyfield
-    sun_obj = eph['SUN']
     # Create Sun at center with mass from constants
     sun = Sun(0, 0, 2, constants.sun_mass)
     # List to hold planet objects
     planets = []
 
-    # Map planet names to the names Skyfield expects for the de440s kernel
-    skyfield_names = {
-        "MERCURY": "MERCURY",
-        "VENUS": "VENUS",
-        "EARTH": "EARTH", # Special handling for Earth to get the planet
-        "MARS": "MARS BARYCENTER",
-        "JUPITER": "JUPITER BARYCENTER",
-        "SATURN": "SATURN BARYCENTER",
-        "URANUS": "URANUS BARYCENTER",
-        "NEPTUNE": "NEPTUNE BARYCENTER",
-    }
-
-    # Loop through our planet data and create Planet objects with positions and velocities from Skyfield
+    # Loop through our planet data and create Planet objects with positions and velocities from the ephemeris
     for data in constants.PLANETS_DATA:
         planet_name_upper = data["name"].upper()
         
-        # Get the correct skyfield object name from our map
-        skyfield_name = skyfield_names.get(planet_name_upper)
-        
-        if skyfield_name is None:
-            continue # Skip if we don't have a mapping for this planet
-
-        # For Earth, we need to get the planet itself, not the barycenter with the Moon
-        if planet_name_upper == "EARTH":
-            sky_planet = eph['earth']
-        else:
-            sky_planet = eph[skyfield_name]
+        if planet_name_upper not in vectors:
+            continue # Skip if we don't have ephemeris data for this planet
 
-        # Get position and velocity from Skyfield
-        astrometric = (sky_planet - sun_obj).at(t)
-        position = astrometric.position
-        velocity = astrometric.velocity
-
-        # Convert from AU and AU/day to meters and m/s
-        x = position.au[0] * constants.AU
-        y = position.au[1] * constants.AU  # Use x and y for 2D projection
-        
-        vx = velocity.au_per_d[0] * constants.AU / (24 * 3600)
-        vy = velocity.au_per_d[1] * constants.AU / (24 * 3600)
+        x, y, vx, vy = vectors[planet_name_upper]
 
         # Create Planet object with scaled size and mass from constants
         planet = Planet(
@@ -77,7 +43,7 @@ def create_solarsystem():
             name=data["name"],
             is_inner_planet=data.get("is_inner", False)
         )
-        # Set velocity from Skyfield data
+        # Set velocity from ephemeris data
         planet.x_vel = vx
         planet.y_vel = vy
         # Draw orbit lines for planets (except the Sun)
@@ -287,4 +253,13 @@ def create_pluto():
     pluto.color = constants.COLOR_PLUTO
     pluto.draw_line = True  # Show orbit trail for Pluto
     
-    return pluto
\ No newline at end of file
+    return pluto
+
+def create_current_solarsystem(num_asteroids=300, num_tno_objects=100, epoch=None):
+    """Create all bodies of the simulation in the order used by main.py."""
+    solarsystem = create_solarsystem(epoch)
+    major_asteroids = create_major_asteroids()
+    asteroids = create_asteroid_belt(num_asteroids=num_asteroids)
+    tno_belt = create_TNO_belt(num_objects=num_tno_objects)
+    pluto = create_pluto()
+    return solarsystem + major_asteroids + asteroids + tno_belt + [pluto]
@@ -0,0 +1,142 @@
+# solarsystem_ephemeris.py
+"""
+Planet state vectors from JPL ephemerides, with a local per-day cache.
+
+The cache is a small JSON file in the user cache directory
+(constants.EPHEMERIS_CACHE_PATH, or $SOLARSYSTEM_EPHEMERIS_CACHE) mapping an epoch ("YYYY-MM-DD", 0h UTC) to
+the heliocentric x, y, vx, vy of every planet in metres and m/s. Skyfield is
+only imported on a cache miss. To prepare a cache for machines without
+network access:
+
+    python solarsystem_ephemeris.py --start 2026-01-01 --days 365
+"""
+import argparse
+import datetime
+import json
+import os
+
+import constants
+
+# Map planet names to the names Skyfield expects for the de440s kernel
+SKYFIELD_NAMES = {
+    "MERCURY": "MERCURY",
+    "VENUS": "VENUS",
+    "EARTH": "EARTH", # Special handling for Earth to get the planet
+    "MARS": "MARS BARYCENTER",
+    "JUPITER": "JUPITER BARYCENTER",
+    "SATURN": "SATURN BARYCENTER",
+    "URANUS": "URANUS BARYCENTER",
+    "NEPTUNE": "NEPTUNE BARYCENTER",
+}
+
+
+def today():
+    """Current UTC date, the default simulation epoch."""
+    return datetime.datetime.now(datetime.timezone.utc).date()
+
+
+def cache_path(path=None):
+    """Cache file to use: `path`, else $SOLARSYSTEM_EPHEMERIS_CACHE, else the per-user default."""
+    return path or os.environ.get(constants.EPHEMERIS_CACHE_ENV_VAR) or constants.EPHEMERIS_CACHE_PATH
+
+
+def load_cache(path=None):
+    path = cache_path(path)
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_cache(cache, path=None):
+    path = cache_path(path)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    # Write to a temporary file first so an interrupted run keeps the old cache
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def compute_state_vectors(dates):
+    """Query Skyfield for the planet state vectors at 0h UTC of each date."""
+    # Deferred import, only needed on a cache miss
+    from skyfield.api import load
+
+    # Use most recent DE440s ephemeris for accurate planetary positions
+    eph = load(constants.EPHEMERIS_KERNEL)
+    ts = load.timescale()
+    sun_obj = eph['SUN']
+
+    result = {}
+    for date in dates:
+        t = ts.utc(date.year, date.month, date.day)
+        vectors = {}
+        for name, skyfield_name in SKYFIELD_NAMES.items():
+            # For Earth, we need to get the planet itself, not the barycenter with the Moon
+            sky_planet = eph['earth'] if name == "EARTH" else eph[skyfield_name]
+
+            astrometric = (sky_planet - sun_obj).at(t)
+            position = astrometric.position
+            velocity = astrometric.velocity
+
+            # Convert from AU and AU/day to meters and m/s, x and y for 2D projection
+            vectors[name] = [
+                position.au[0] * constants.AU,
+                position.au[1] * constants.AU,
+                velocity.au_per_d[0] * constants.AU / (24 * 3600),
+                velocity.au_per_d[1] * constants.AU / (24 * 3600),
+            ]
+        result[date.isoformat()] = vectors
+    return result
+
+
+def state_vectors(epoch=None, path=None):
+    """Return (epoch, vectors) with the planet state vectors for a date.
+
+    `vectors` maps upper-case planet names to [x, y, vx, vy]. Cached epochs
+    are used without touching Skyfield. On a cache miss Skyfield computes the
+    vectors and the cache is updated. If Skyfield or its kernel is not
+    available, the nearest cached epoch is used instead.
+    """
+    epoch = epoch or today()
+    path = cache_path(path)
+    cache = load_cache(path)
+    key = epoch.isoformat()
+    if key in cache:
+        return epoch, cache[key]
+
+    try:
+        computed = compute_state_vectors([epoch])
+    except (ImportError, OSError) as error:
+        if not cache:
+            raise RuntimeError(f"No cached ephemeris in {path} and Skyfield could not be used: {error}") from error
+        nearest = min(cache, key=lambda k: abs(datetime.date.fromisoformat(k) - epoch))
+        print(f"Skyfield unavailable ({error}), using cached epoch {nearest} instead of {key}")
+        return datetime.date.fromisoformat(nearest), cache[nearest]
+
+    cache.update(computed)
+    save_cache(cache, path)
+    return epoch, computed[key]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill the ephemeris cache for offline use")
+    parser.add_argument("--start", type=datetime.date.fromisoformat, default=today(),
+                        help="First epoch as YYYY-MM-DD (default: today)")
+    parser.add_argument("--days", type=int, default=1, help="Number of consecutive days to cache")
+    parser.add_argument("--cache", default=None,
+                        help=f"Cache file (default: ${constants.EPHEMERIS_CACHE_ENV_VAR} or {constants.EPHEMERIS_CACHE_PATH})")
+    args = parser.parse_args()
+    args.cache = cache_path(args.cache)
+
+    dates = [args.start + datetime.timedelta(days=i) for i in range(args.days)]
+    cache = load_cache(args.cache)
+    cache.update(compute_state_vectors(dates))
+    save_cache(cache, args.cache)
+    print(f"Cached {len(dates)} epochs in {args.cache} ({len(cache)} total)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# solarsystem_gravity.py
+
+import constants
+import numpy as np
+from solarsystem_backends import get_backend
+from solarsystem_barneshut import QuadTree
+
+
+class GravityEngine:
+    """Batched gravitational accelerations for all bodies in a state store.
+
+    Bodies with a mass at or above `mass_threshold` form the massive set.
+    Massive bodies attract each other and every test particle, test particles
+    only feel the massive set. The acceleration on body i is
+    G * sum_j m_j * d_ij / |d_ij|^3, computed by the compute backend named
+    `backend` (see solarsystem_backends).
+
+    With `self_gravity` enabled, the test particles (asteroid belt and TNOs)
+    also attract each other and the massive bodies. Their pull is computed
+    with a Barnes-Hut quadtree that is rebuilt for every force evaluation.
+
+    If `bodies` (store indices) is given, the engine only covers those
+    bodies: positions passed in and all indices are relative to that subset.
+    """
+
+    def __init__(self, state, mass_threshold=constants.MASSIVE_BODY_THRESHOLD,
+                 self_gravity=False, opening_angle=constants.BARNES_HUT_OPENING_ANGLE, bodies=None, backend=None):
+        self.state = state
+        self.mass_threshold = mass_threshold
+        self.self_gravity = self_gravity
+        self.opening_angle = opening_angle
+        self.bodies = bodies
+        self.backend = get_backend(backend)
+        self.refresh()
+
+    @property
+    def masses(self):
+        masses = self.state.masses
+        return masses if self.bodies is None else masses[self.bodies]
+
+    def refresh(self):
+        """Re-select massive bodies, call after adding bodies or changing masses."""
+        masses = self.masses
+        is_massive = masses >= self.mass_threshold
+        self.massive = np.flatnonzero(is_massive)
+        self.test = np.flatnonzero(~is_massive)
+        self.gm = constants.G * masses[self.massive]
+
+    def accelerations(self, pos, targets=None):
+        """Return the (N, 2) accelerations at positions `pos`.
+
+        `pos` holds the positions of all bodies in the store. If `targets` is
+        given, only the accelerations of those body indices are returned.
+        """
+        points = pos if targets is None else pos[targets]
+        acc = self.backend.accelerations(points, pos[self.massive], self.gm)
+        if self.self_gravity and len(self.test):
+            acc += self.tree_accelerations(pos, points)
+        return acc
+
+    def tree_accelerations(self, pos, points):
+        """Pull of all test particles on `points`, using a Barnes-Hut tree."""
+        masses = self.masses
+        tree = QuadTree(pos[self.test], masses[self.test], opening_angle=self.opening_angle)
+        return tree.accelerations(points)
+
+    def massive_accelerations(self, pos):
+        """Mutual accelerations within the massive set, shape (M, 2)."""
+        return self.accelerations(pos, self.massive)
+
+    def test_accelerations(self, pos):
+        """Accelerations of all test particles due to the massive set."""
+        return self.accelerations(pos, self.test)
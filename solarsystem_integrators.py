@@ -0,0 +1,165 @@
+# solarsystem_integrators.py
+
+import constants
+import math
+import numpy as np
+
+# All integrators advance every body synchronously: positions and velocities
+# are (N, 2) arrays updated in place, and `accel(pos)` returns the (N, 2)
+# accelerations for a full set of positions. `accel(pos, targets)` returns
+# only the accelerations of the given body indices.
+
+# Yoshida 4th-order coefficients
+_CBRT2 = 2 ** (1 / 3)
+_W1 = 1 / (2 - _CBRT2)
+_W0 = -_CBRT2 * _W1
+YOSHIDA_C = (_W1 / 2, (_W0 + _W1) / 2, (_W0 + _W1) / 2, _W1 / 2)
+YOSHIDA_D = (_W1, _W0, _W1)
+
+
+def euler_step(pos, vel, dt, accel):
+    """Semi-implicit (symplectic) Euler, first order."""
+    vel += accel(pos) * dt
+    pos += vel * dt
+
+
+def leapfrog_step(pos, vel, dt, accel):
+    """Kick-drift-kick leapfrog, second order symplectic."""
+    vel += accel(pos) * (dt / 2)
+    pos += vel * dt
+    vel += accel(pos) * (dt / 2)
+
+
+def verlet_step(pos, vel, dt, accel):
+    """Velocity Verlet, second order symplectic."""
+    acc = accel(pos)
+    pos += vel * dt + acc * (dt * dt / 2)
+    vel += (acc + accel(pos)) * (dt / 2)
+
+
+def yoshida4_step(pos, vel, dt, accel):
+    """Yoshida 4th-order symplectic integrator (three leapfrog sub-steps)."""
+    for c, d in zip(YOSHIDA_C, YOSHIDA_D):
+        pos += vel * (c * dt)
+        vel += accel(pos) * (d * dt)
+    pos += vel * (YOSHIDA_C[3] * dt)
+
+
+def rk4_step(pos, vel, dt, accel):
+    """Classic 4th-order Runge-Kutta (not symplectic, for comparison)."""
+    k1_x = vel.copy()
+    k1_v = accel(pos)
+    k2_x = vel + k1_v * (dt / 2)
+    k2_v = accel(pos + k1_x * (dt / 2))
+    k3_x = vel + k2_v * (dt / 2)
+    k3_v = accel(pos + k2_x * (dt / 2))
+    k4_x = vel + k3_v * dt
+    k4_v = accel(pos + k3_x * dt)
+
+    pos += (k1_x + 2 * k2_x + 2 * k3_x + k4_x) * (dt / 6)
+    vel += (k1_v + 2 * k2_v + 2 * k3_v + k4_v) * (dt / 6)
+
+
+def orbital_time_scales(vel, acc, reference=None):
+    """Orbital time scale |v| / |a| of every body (the period / 2 pi on a circular orbit).
+
+    With `reference`, the index of the central body (the Sun), velocities and
+    accelerations are taken relative to it. The central body itself has no
+    orbit, its own |v| / |a| only measures how long it has been moving, so
+    it gets an infinite time scale like bodies at rest.
+    """
+    if reference is not None:
+        vel = vel - vel[reference]
+        acc = acc - acc[reference]
+    speed = np.hypot(vel[:, 0], vel[:, 1])
+    accel_norm = np.hypot(acc[:, 0], acc[:, 1])
+    scales = np.full(len(vel), np.inf)
+    moving = (speed > 0) & (accel_norm > 0)
+    if reference is not None:
+        moving[reference] = False
+    scales[moving] = speed[moving] / accel_norm[moving]
+    return scales
+
+
+def assign_levels(vel, acc, dt, steps_per_orbit=constants.BLOCK_STEPS_PER_ORBIT,
+                  max_level=constants.BLOCK_MAX_LEVEL, reference=None):
+    """Choose a power-of-two step level for every body.
+
+    A body on level k takes steps of |dt| / 2**k. The level is the smallest
+    one giving at least `steps_per_orbit` steps per orbit, with the orbit
+    estimated by orbital_time_scales() relative to `reference`.
+    """
+    period = 2 * math.pi * orbital_time_scales(vel, acc, reference)
+    # Bodies at rest, without acceleration or without an orbit stay on the base level
+    with np.errstate(divide="ignore"):
+        levels = np.ceil(np.log2(abs(dt) * steps_per_orbit / period))
+    return np.clip(levels, 0, max_level).astype(np.int64)
+
+
+def block_leapfrog_step(pos, vel, dt, accel, reference=None, acc=None):
+    """Kick-drift-kick leapfrog with hierarchical block time steps.
+
+    `dt` is the block step, negative to run backwards. Each body is
+    sub-stepped on its own power-of-two level from `assign_levels`, so fast
+    inner bodies take many small steps while outer planets and TNOs take
+    few. `reference` is the index of the central body the orbits are
+    measured against. All bodies drift together on the finest level, but
+    forces are only evaluated for the bodies whose own step ends on a given
+    sub-step.
+
+    `acc` are the accelerations at `pos` if already known. The accelerations
+    at the end of the block are returned, so consecutive blocks can skip
+    the opening force evaluation.
+    """
+    if acc is None:
+        acc = accel(pos)
+    levels = assign_levels(vel, acc, dt, reference=reference)
+    finest = int(levels.max())
+    substeps = 1 << finest
+    substep_dt = dt / substeps
+
+    # Sub-steps per own step, and the own step length of every body
+    stride = 1 << (finest - levels)
+    body_dt = stride * substep_dt
+
+    # A body's step ends on sub-step s if s has at least finest - level
+    # trailing zero bits, so there are only finest + 1 distinct active sets
+    actives = [np.flatnonzero(levels >= finest - zeros) for zeros in range(finest + 1)]
+    kicks = [body_dt[active, np.newaxis] for active in actives]
+
+    # Opening half kick for all bodies
+    vel += acc * (body_dt / 2)[:, np.newaxis]
+
+    for s in range(1, substeps + 1):
+        pos += vel * substep_dt
+
+        zeros = (s & -s).bit_length() - 1
+        active = actives[zeros]
+        kick = kicks[zeros]
+        if s < substeps:
+            # Closing half kick and opening half kick of the next own step
+            vel[active] += accel(pos, active) * kick
+        else:
+            # All bodies are synchronized again at the end of the block
+            acc = accel(pos)
+            vel += acc * (body_dt / 2)[:, np.newaxis]
+    return acc
+
+
+# Integrators selectable by name
+INTEGRATORS = {
+    "euler": euler_step,
+    "leapfrog": leapfrog_step,
+    "verlet": verlet_step,
+    "yoshida4": yoshida4_step,
+    "rk4": rk4_step,
+    "block": block_leapfrog_step,
+}
+
+
+def get_integrator(name):
+    """Look up an integrator step function by name."""
+    try:
+        return INTEGRATORS[name]
+    except KeyError:
+        raise ValueError(f"Unknown integrator '{name}', choose from: {', '.join(INTEGRATORS)}") from None
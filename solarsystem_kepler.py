@@ -0,0 +1,119 @@
+# solarsystem_kepler.py
+
+import constants
+import numpy as np
+
+
+def starting_guess(mean_anomaly, e):
+    """Danby's starting value for Kepler's equation, converges for all e < 1."""
+    return mean_anomaly + 0.85 * e * np.sign(np.sin(mean_anomaly))
+
+
+def solve_kepler(mean_anomaly, e, guess=None, tolerance=constants.KEPLER_TOLERANCE,
+                 max_iterations=constants.KEPLER_MAX_ITERATIONS):
+    """Solve Kepler's equation E - e sin E = M for arrays of M and e (e < 1).
+
+    Newton iteration over the whole array, stopping once every eccentric
+    anomaly has converged to `tolerance` radians. Without a `guess`,
+    `starting_guess` is used.
+    """
+    if guess is None:
+        E = starting_guess(mean_anomaly, e)
+    else:
+        E = np.array(guess, dtype=np.float64)
+    for _ in range(max_iterations):
+        sin_E = np.sin(E)
+        cos_E = np.cos(E)
+        delta = (E - e * sin_E - mean_anomaly) / (1 - e * cos_E)
+        E -= delta
+        if np.abs(delta).max(initial=0.0) < tolerance:
+            break
+    return E
+
+
+class KeplerOrbits:
+    """Analytic two-body orbits around the Sun for a set of test particles.
+
+    The heliocentric position and velocity of every particle are converted
+    to orbital elements once. States at any later time come from the mean
+    anomaly and `solve_kepler`, so the cost per particle does not depend on
+    the step size and there is no energy drift. Only bound (elliptic) orbits
+    can be propagated, see `bound()`. `solver` has the signature of
+    `solve_kepler`, compute backends provide their own.
+    """
+
+    def __init__(self, rel_pos, rel_vel, mu, start_time=0.0, solver=solve_kepler):
+        self.mu = mu
+        self.start_time = start_time
+        self.solver = solver
+
+        r = np.hypot(rel_pos[:, 0], rel_pos[:, 1])
+        v2 = np.einsum("ij,ij->i", rel_vel, rel_vel)
+        r_dot_v = np.einsum("ij,ij->i", rel_pos, rel_vel)
+        # Sign of the angular momentum, +1 for counter-clockwise orbits
+        h = rel_pos[:, 0] * rel_vel[:, 1] - rel_pos[:, 1] * rel_vel[:, 0]
+        direction = np.where(h < 0, -1.0, 1.0)
+
+        self.a = 1 / (2 / r - v2 / mu)  # Semi-major axis, negative if unbound
+        e_vec = ((v2 - mu / r)[:, np.newaxis] * rel_pos - r_dot_v[:, np.newaxis] * rel_vel) / mu
+        self.e = np.hypot(e_vec[:, 0], e_vec[:, 1])
+
+        # Perifocal frame: P towards the periapsis (any direction for circular
+        # orbits), Q perpendicular in the direction of motion
+        circular = self.e < 1e-12
+        p = np.where(circular[:, np.newaxis], rel_pos / r[:, np.newaxis],
+                     e_vec / np.where(circular, 1.0, self.e)[:, np.newaxis])
+        self.p = p
+        self.q = direction[:, np.newaxis] * np.column_stack((-p[:, 1], p[:, 0]))
+
+        # Mean anomaly at the start time and mean motion of the bound orbits
+        a = np.where(self.bound(), self.a, 1.0)
+        e = np.minimum(self.e, 1 - 1e-12)
+        self.b = a * np.sqrt(1 - e * e)
+        x_p = np.einsum("ij,ij->i", rel_pos, p)
+        y_p = np.einsum("ij,ij->i", rel_pos, self.q)
+        E = np.arctan2(y_p / self.b, x_p / a + e)
+        self.mean_anomaly = E - e * np.sin(E)
+        self.mean_motion = np.sqrt(mu / a ** 3)
+
+        # Last solution, the starting guess for the next nearby time
+        self._last_time = None
+        self._last_E = None
+        self._last_cos_E = None
+
+    def __len__(self):
+        return len(self.e)
+
+    def bound(self):
+        """Mask of the particles on elliptic orbits."""
+        return (self.a > 0) & (self.e < 1)
+
+    def state_at(self, time):
+        """Positions and velocities relative to the Sun at simulated `time`."""
+        # Reduced to [0, 2 pi), after many orbits the solver would lose precision
+        mean_anomaly = np.mod(self.mean_anomaly + self.mean_motion * (time - self.start_time), 2 * np.pi)
+
+        # Small time steps start from the previous solution, which saves
+        # about half of the Newton iterations
+        guess = None
+        if self._last_time is not None and len(self):
+            step = self.mean_motion * (time - self._last_time)
+            if np.abs(step).max() < 0.5:
+                guess = self._last_E + step / (1 - self.e * self._last_cos_E)
+                # Same turn as the reduced mean anomaly, E - M = e sin E is below one radian
+                guess -= 2 * np.pi * np.round((guess - mean_anomaly) / (2 * np.pi))
+        E = self.solver(mean_anomaly, self.e, guess)
+        sin_E = np.sin(E)
+        cos_E = np.cos(E)
+        self._last_time, self._last_E, self._last_cos_E = time, E, cos_E
+
+        # Coordinates in the perifocal frame
+        x_p = self.a * (cos_E - self.e)
+        y_p = self.b * sin_E
+        E_dot = self.mean_motion / (1 - self.e * cos_E)
+        vx_p = -self.a * sin_E * E_dot
+        vy_p = self.b * cos_E * E_dot
+
+        pos = x_p[:, np.newaxis] * self.p + y_p[:, np.newaxis] * self.q
+        vel = vx_p[:, np.newaxis] * self.p + vy_p[:, np.newaxis] * self.q
+        return pos, vel
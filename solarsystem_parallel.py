@@ -0,0 +1,187 @@
+# solarsystem_parallel.py
+"""
+Sharded propagation of test particles on worker processes.
+
+Test particles do not act on anything, so once the massive bodies have been
+stepped every particle can be advanced on its own. The positions and
+velocities of the state store are moved into shared memory and the particles
+are split into one shard per worker process. Each step, the main process
+integrates the massive bodies and broadcasts their positions at every force
+evaluation of the integrator (a few hundred bytes per evaluation). The
+workers then run the same integrator on their shard against those positions,
+which gives the same result as integrating all bodies together. Two barrier
+waits per step are the only synchronization, nothing is pickled after startup.
+"""
+import multiprocessing
+from multiprocessing import shared_memory
+from threading import BrokenBarrierError
+
+import constants
+import numpy as np
+from solarsystem_backends import get_backend
+from solarsystem_integrators import INTEGRATORS
+
+# Force evaluations per step that can be broadcast (RK4 needs four)
+MAX_STAGES = 4
+
+# Commands in the control block
+STEP = 0
+STOP = 1
+
+# The block integrator chooses its sub-steps from the bodies it moves, so its
+# force evaluations cannot be replayed for the particles
+SHARDABLE_INTEGRATORS = [name for name in INTEGRATORS if name != "block"]
+_INTEGRATOR_CODES = {INTEGRATORS[name]: code for code, name in enumerate(SHARDABLE_INTEGRATORS)}
+
+
+def _attach(name):
+    """Open a shared memory block created by the main process."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 the block is registered again with the resource
+        # tracker, which the workers share with the main process, so it is
+        # still only unlinked once
+        return shared_memory.SharedMemory(name=name)
+
+
+def _as_slice(indices):
+    """A slice for a contiguous run of indices, so the shard is a view."""
+    if len(indices) and indices[-1] - indices[0] + 1 == len(indices):
+        return slice(int(indices[0]), int(indices[-1]) + 1)
+    return indices
+
+
+def _propagate_shard(blocks, count, shard, sources, gm, backend, barrier):
+    backend = get_backend(backend)
+    pos = np.ndarray((count, 2), buffer=blocks[0].buf)
+    vel = np.ndarray((count, 2), buffer=blocks[1].buf)
+    stages = np.ndarray((MAX_STAGES, sources, 2), buffer=blocks[2].buf)
+    control = np.ndarray(4, buffer=blocks[3].buf)
+
+    while True:
+        barrier.wait()
+        if control[0] == STOP:
+            return
+        dt = control[1]
+        integrator = INTEGRATORS[SHARDABLE_INTEGRATORS[int(control[2])]]
+        stage = iter(stages[:int(control[3])])
+
+        def accel(points, targets=None):
+            if targets is not None:
+                points = points[targets]
+            return backend.accelerations(points, next(stage), gm)
+
+        shard_pos = pos[shard]
+        shard_vel = vel[shard]
+        integrator(shard_pos, shard_vel, dt, accel)
+        if not isinstance(shard, slice):
+            pos[shard] = shard_pos
+            vel[shard] = shard_vel
+        barrier.wait()
+
+
+def _run_worker(names, count, shard, sources, gm, backend, barrier):
+    """Worker process: advance one shard each time the main process starts a step."""
+    blocks = [_attach(name) for name in names]
+    try:
+        _propagate_shard(blocks, count, shard, sources, gm, backend, barrier)
+    except BaseException:
+        # Wake up the main process instead of leaving it at the barrier
+        barrier.abort()
+        raise
+    finally:
+        for block in blocks:
+            block.close()
+
+
+class ShardedPropagator:
+    """Advance test particles on worker processes, in step with the massive bodies.
+
+    `bodies` are the store indices of the particles and `sources` those of
+    the bodies attracting them. The source bodies are integrated by the
+    caller with the acceleration function returned by recording(), then
+    start() lets the workers advance the particles and wait() returns once
+    they are done. The workers use the compute backend named `backend`. The
+    state store stays in shared memory until close().
+    """
+
+    def __init__(self, state, bodies, sources, processes, backend=None):
+        self.state = state
+        pos_block, vel_block = state.share_memory()
+        self._blocks = [
+            shared_memory.SharedMemory(create=True, size=max(MAX_STAGES * len(sources) * 16, 1)),
+            shared_memory.SharedMemory(create=True, size=4 * 8),
+        ]
+        self.stages = np.ndarray((MAX_STAGES, len(sources), 2), buffer=self._blocks[0].buf)
+        self.control = np.ndarray(4, buffer=self._blocks[1].buf)
+        self.stage_count = 0
+
+        gm = constants.G * state.masses[sources]
+        names = (pos_block.name, vel_block.name, self._blocks[0].name, self._blocks[1].name)
+        shards = np.array_split(np.asarray(bodies), max(1, min(processes, len(bodies))))
+
+        context = multiprocessing.get_context()
+        self.barrier = context.Barrier(len(shards) + 1)
+        self.workers = []
+        for i, shard in enumerate(shards):
+            worker = context.Process(target=_run_worker, name=f"ParticleShard-{i}", daemon=True,
+                                     args=(names, state.count, _as_slice(shard), len(sources), gm, backend,
+                                           self.barrier))
+            worker.start()
+            self.workers.append(worker)
+
+    def __len__(self):
+        return len(self.workers)
+
+    def recording(self, accel):
+        """Wrap the acceleration function of the source bodies for one step.
+
+        The source positions of every force evaluation are stored for the
+        workers before the accelerations are computed.
+        """
+        self.stage_count = 0
+
+        def recorded(pos, targets=None):
+            if self.stage_count == MAX_STAGES:
+                raise RuntimeError(f"Sharded particles support at most {MAX_STAGES} force evaluations per step")
+            self.stages[self.stage_count] = pos
+            self.stage_count += 1
+            return accel(pos, targets)
+
+        return recorded
+
+    def start(self, dt, integrator):
+        """Let the workers advance their shards with the recorded source positions."""
+        try:
+            code = _INTEGRATOR_CODES[integrator]
+        except KeyError:
+            raise ValueError("Sharded particles need a fixed-step integrator: "
+                             f"{', '.join(SHARDABLE_INTEGRATORS)}") from None
+        self.control[:] = (STEP, dt, code, self.stage_count)
+        self.barrier.wait()
+
+    def wait(self):
+        """Block until all shards have been advanced."""
+        self.barrier.wait()
+
+    def close(self):
+        """Stop the workers and move the state store back to private memory."""
+        if not self.workers:
+            return
+        self.control[0] = STOP
+        try:
+            self.barrier.wait(timeout=5)
+        except BrokenBarrierError:
+            pass  # A worker failed or is gone, stop the rest below
+        for worker in self.workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+        self.workers = []
+
+        self.stages = self.control = None
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self.state.release_shared_memory()
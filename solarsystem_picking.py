@@ -0,0 +1,65 @@
+# solarsystem_picking.py
+
+import constants
+import numpy as np
+
+
+class SpatialHash:
+    """Uniform screen-space grid over the projected positions of all bodies.
+
+    build() bins the on-screen bodies into square cells of `cell_size`
+    pixels with one stable sort on the cell number, which NumPy does as a
+    radix sort for 16-bit keys, so a rebuild is linear in the body count.
+    The bodies of a cell are then one slice of `order`, and query() only
+    looks at the few cells around the cursor instead of at every body.
+    """
+
+    def __init__(self, cell_size=constants.PICK_CELL_SIZE, width=constants.WIDTH, height=constants.HEIGHT):
+        self.cell_size = cell_size
+        self.width = width
+        self.height = height
+        self.columns = -(-width // cell_size)
+        self.rows = -(-height // cell_size)
+        self.screen = np.zeros((0, 2))
+        self.order = np.zeros(0, dtype=np.int64)  # Body indices sorted by cell
+        self.starts = np.zeros(self.columns * self.rows + 1, dtype=np.int64)  # Start of every cell in `order`
+
+    def build(self, screen):
+        """Bin the screen positions of all bodies, shape (N, 2), e.g. Camera.screen."""
+        self.screen = screen
+        # Whole pixels, query() measures the exact distances. Negative values
+        # wrap around as unsigned, so one comparison culls both screen edges
+        x = screen[:, 0].astype(np.int32)
+        y = screen[:, 1].astype(np.int32)
+        inside = (x.view(np.uint32) < self.width) & (y.view(np.uint32) < self.height)
+
+        # Off-screen bodies go to an extra cell after the last one, which sorts them to the end
+        off_screen = len(self.starts) - 1
+        cells = (y // self.cell_size) * self.columns + x // self.cell_size
+        cells[~inside] = off_screen
+        cells = cells.astype(np.uint16 if off_screen < 1 << 16 else np.int64)
+
+        counts = np.bincount(cells, minlength=off_screen + 1)
+        np.cumsum(counts[:-1], out=self.starts[1:])
+        self.order = np.argsort(cells, kind="stable")[:self.starts[-1]]
+
+    def query(self, x, y, radius=constants.PICK_RADIUS):
+        """Index of the body nearest to screen point (x, y) within `radius` pixels, or None."""
+        first_column = max(int((x - radius) // self.cell_size), 0)
+        last_column = min(int((x + radius) // self.cell_size), self.columns - 1)
+        first_row = max(int((y - radius) // self.cell_size), 0)
+        last_row = min(int((y + radius) // self.cell_size), self.rows - 1)
+        if first_column > last_column or first_row > last_row:
+            return None
+
+        # Every row of cells is one contiguous run of `order`
+        candidates = np.concatenate([
+            self.order[self.starts[row * self.columns + first_column]:self.starts[row * self.columns + last_column + 1]]
+            for row in range(first_row, last_row + 1)
+        ])
+        if not len(candidates):
+            return None
+        offsets = self.screen[candidates] - (x, y)
+        distances = np.einsum("ij,ij->i", offsets, offsets)
+        nearest = int(np.argmin(distances))
+        return int(candidates[nearest]) if distances[nearest] <= radius * radius else None
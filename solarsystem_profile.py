@@ -0,0 +1,124 @@
+# solarsystem_profile.py
+
+import json
+import os
+import time
+from collections import deque
+
+import constants
+
+
+class StartupProfile:
+    """Wall-clock timings of consecutive startup phases.
+
+    Each call to mark() closes the phase that started at the previous mark
+    (or at `start`), so the phases add up to the total startup time.
+    """
+
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        self.last = self.start
+        self.phases = []
+
+    def mark(self, name):
+        """End the current phase and record its duration under `name`."""
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    @property
+    def total(self):
+        return self.last - self.start
+
+    def report(self):
+        """Return the phase timings as a printable table."""
+        width = max([len(name) for name, _ in self.phases] + [len("total")])
+        lines = ["Startup profile:"]
+        for name, duration in self.phases:
+            share = 100 * duration / self.total if self.total > 0 else 0.0
+            lines.append(f"  {name:<{width}}  {duration * 1000:8.1f} ms  {share:5.1f} %")
+        lines.append(f"  {'total':<{width}}  {self.total * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted, non-empty list."""
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+class FrameProfile:
+    """Per-phase timings of the frames of the main loop.
+
+    Like StartupProfile, each mark() closes the phase that started at the
+    previous mark (or at start_frame()). The durations of the last `window`
+    frames are kept per phase. The phases of the first `trace_frames` frames
+    are also kept as Chrome trace events, see write_trace().
+    """
+
+    def __init__(self, window=constants.FRAME_PROFILE_WINDOW, trace_frames=0):
+        self.window = window
+        self.phases = {}  # Phase name -> durations of the last frames in seconds
+        self.frame_times = deque(maxlen=window)
+        self.frames = 0
+        self._current = {}
+        self._frame_start = self.last = time.perf_counter()
+
+        self.trace_frames = trace_frames
+        self.trace_events = []
+        self._origin = self._frame_start
+
+    def start_frame(self):
+        self._frame_start = self.last = time.perf_counter()
+        self._current.clear()
+
+    def mark(self, name):
+        """End the current phase and add its duration to `name`."""
+        now = time.perf_counter()
+        self._current[name] = self._current.get(name, 0.0) + now - self.last
+        if self.frames < self.trace_frames:
+            self._trace(name, self.last, now)
+        self.last = now
+
+    def end_frame(self):
+        """Store the phase durations of the frame that just ended."""
+        for name in self._current:
+            if name not in self.phases:
+                # Frames before the phase first appeared took no time in it
+                self.phases[name] = deque([0.0] * len(self.frame_times), maxlen=self.window)
+        for name, samples in self.phases.items():
+            samples.append(self._current.get(name, 0.0))
+        self.frame_times.append(self.last - self._frame_start)
+        if self.frames < self.trace_frames:
+            self._trace("frame", self._frame_start, self.last)
+        self.frames += 1
+
+    def stats(self):
+        """Return [(phase, p50, p95, max)] in milliseconds, the whole frame last."""
+        rows = []
+        for name, samples in list(self.phases.items()) + [("frame", self.frame_times)]:
+            if samples:
+                ordered = sorted(samples)
+                rows.append((name, 1000 * percentile(ordered, 0.5), 1000 * percentile(ordered, 0.95),
+                             1000 * ordered[-1]))
+        return rows
+
+    def _trace(self, name, start, end):
+        self.trace_events.append({
+            "name": name,
+            "cat": "frame",
+            "ph": "X",  # Complete event with a duration
+            "ts": (start - self._origin) * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": os.getpid(),
+            "tid": 0,
+        })
+
+    @property
+    def trace_complete(self):
+        return self.frames >= self.trace_frames
+
+    def write_trace(self, path):
+        """Write the traced frames as Chrome trace-event JSON (chrome://tracing, Perfetto)."""
+        metadata = {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": 0, "args": {"name": "main loop"}}
+        with open(path, "w") as f:
+            json.dump({"traceEvents": [metadata] + self.trace_events, "displayTimeUnit": "ms"}, f)
@@ -0,0 +1,188 @@
+# solarsystem_recording.py
+"""
+Trajectory recording and replay.
+
+A recording is an append-only file with a fixed 64-byte header followed by
+one fixed-size frame per simulation step: the simulated time (float64) and
+the positions of all bodies (float32). The bodies themselves (colors, radii,
+names, trails at the start) are saved next to it as a checkpoint,
+"<path>.bodies.npz". Replays memory-map the frames, so jumping to any frame
+only reads the pages that are drawn.
+"""
+import os
+
+import constants
+import numpy as np
+from solarsystem_checkpoint import save_checkpoint
+from solarsystem_sim import Body
+
+RECORDING_MAGIC = b"SSTRAJ"
+RECORDING_VERSION = 1
+HEADER_SIZE = 64
+HEADER_DTYPE = np.dtype([
+    ("magic", "S6"),
+    ("version", "<u2"),
+    ("count", "<u8"),  # Bodies per frame
+    ("frame_size", "<u8"),  # Frame stride in bytes
+    ("timestep", "<f8"),
+    ("start_time", "<f8"),
+])
+
+
+def frame_dtype(count):
+    """Layout of one recorded frame for `count` bodies."""
+    return np.dtype([("time", "<f8"), ("pos", "<f4", (count, 2))])
+
+
+def bodies_path(path):
+    """Path of the checkpoint holding the bodies of a recording."""
+    return path + ".bodies.npz"
+
+
+class TrajectoryRecorder:
+    """Stream the positions of every simulation step to a recording file.
+
+    Attach it with `simulation.recorder = TrajectoryRecorder(path, simulation)`,
+    the simulation then appends a frame after each step (or every `every`
+    steps).
+    """
+
+    def __init__(self, path, simulation, every=1, buffer_size=1 << 20):
+        self.path = path
+        self.every = every
+        self._skipped = 0
+        state = simulation.state
+        self.dtype = frame_dtype(state.count)
+        self._frame = np.zeros(1, dtype=self.dtype)
+        self.frames = 0
+
+        save_checkpoint(bodies_path(path), simulation)
+
+        header = np.zeros(1, dtype=HEADER_DTYPE)
+        header["magic"] = RECORDING_MAGIC
+        header["version"] = RECORDING_VERSION
+        header["count"] = state.count
+        header["frame_size"] = self.dtype.itemsize
+        header["timestep"] = Body.TIMESTEP
+        header["start_time"] = simulation.elapsed_time
+
+        self._file = open(path, "wb", buffering=buffer_size)
+        self._file.write(header.tobytes().ljust(HEADER_SIZE, b"\0"))
+        # The initial state is the first frame
+        self._write(state.positions, simulation.elapsed_time)
+
+    def append(self, positions, elapsed_time):
+        """Called after every simulation step."""
+        self._skipped += 1
+        if self._skipped < self.every:
+            return
+        self._skipped = 0
+        self._write(positions, elapsed_time)
+
+    def _write(self, positions, elapsed_time):
+        frame = self._frame[0]
+        frame["time"] = elapsed_time
+        frame["pos"] = positions
+        self._file.write(self._frame.tobytes())
+        self.frames += 1
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class Replay:
+    """Play a recording back at any speed, in either direction.
+
+    `cursor` is a fractional frame index, advance() moves it by `speed`
+    frames per call (one call per rendered frame).
+    """
+
+    def __init__(self, path):
+        header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+        if len(header) == 0 or header["magic"][0] != RECORDING_MAGIC:
+            raise ValueError(f"{path} is not a trajectory recording")
+        header = header[0]
+        if header["version"] != RECORDING_VERSION:
+            raise ValueError(f"Recording {path} has version {header['version']}, expected {RECORDING_VERSION}")
+
+        self.count = int(header["count"])
+        dtype = frame_dtype(self.count)
+        if dtype.itemsize != header["frame_size"]:
+            raise ValueError(f"Recording {path} has an unexpected frame size")
+
+        # Whole frames only, a recording that is cut off stays readable
+        length = (os.path.getsize(path) - HEADER_SIZE) // dtype.itemsize
+        if length < 1:
+            raise ValueError(f"Recording {path} contains no frames")
+        self.frames = np.memmap(path, dtype=dtype, mode="r", offset=HEADER_SIZE, shape=(length,))
+        self.positions = self.frames["pos"]
+        self.times = self.frames["time"]
+
+        self.cursor = 0.0
+        self.speed = 1.0  # Frames per advance()
+        self.direction = 1
+        self.playing = True
+        # Frame the trails were last updated for, the bodies checkpoint holds them at frame 0
+        self._trail_frame = 0
+
+    def __len__(self):
+        return len(self.frames)
+
+    @property
+    def frame(self):
+        return int(self.cursor)
+
+    def advance(self):
+        """Move the cursor for one rendered frame and return the frame index."""
+        if self.playing:
+            self.seek(self.cursor + self.direction * self.speed)
+            # Stop at either end of the recording
+            if self.cursor in (0, len(self) - 1):
+                self.playing = False
+        return self.frame
+
+    def seek(self, cursor):
+        self.cursor = float(min(max(cursor, 0), len(self) - 1))
+
+    def toggle(self):
+        """Pause or resume, restarting from the other end once finished."""
+        if not self.playing and self.cursor == (len(self) - 1 if self.direction > 0 else 0):
+            self.seek(0 if self.direction > 0 else len(self) - 1)
+        self.playing = not self.playing
+
+    def reverse(self):
+        self.direction = -self.direction
+
+    def update_trails(self, bodies, frame, max_points=constants.REPLAY_TRAIL_POINTS):
+        """Bring the trails of `bodies` to `frame`.
+
+        The trails start as loaded from the bodies checkpoint, at frame 0.
+        Playing forward appends the frames in between, stepping back drops
+        points from the newest end. Any other jump rebuilds the trails from
+        at most `max_points` evenly spaced frames. Only the pages holding
+        the trail bodies are read from the recording.
+        """
+        bodies = [body for body in bodies if body.orbit.capacity]
+        if not bodies:
+            return
+        indices = np.array([body.index for body in bodies])
+        last = self._trail_frame
+        self._trail_frame = frame
+        capacity = max(body.orbit.capacity for body in bodies)
+
+        if last < frame <= last + capacity:
+            points = self.positions[last + 1:frame + 1, indices]
+            for i, body in enumerate(bodies):
+                body.orbit.extend(points[:, i])
+        elif frame < last and all(len(body.orbit) > last - frame for body in bodies):
+            for body in bodies:
+                body.orbit.truncate(last - frame)
+        elif last != frame:
+            first = max(0, frame + 1 - capacity)
+            stride = max(1, (frame + 1 - first) // max_points)
+            # Newest frame first so the current position is always included
+            points = self.positions[frame:first - 1 if first else None:-stride, indices][::-1]
+            for i, body in enumerate(bodies):
+                body.orbit.clear()
+                body.orbit.restore(points[:, i], len(points))
@@ -0,0 +1,75 @@
+# solarsystem_render.py
+
+import constants
+import numpy as np
+import pygame
+
+
+class AsteroidRenderer:
+    """Draw all asteroids and TNOs as one vectorized point cloud.
+
+    Positions are projected and culled with NumPy. Radius-1 asteroids (the
+    2x2 footprint of a radius-1 pygame circle) are written straight into the
+    surface pixels through pygame.surfarray; larger ones are stamped from a
+    pre-rendered sprite per size and color with a single blits call.
+    """
+
+    def __init__(self, asteroids):
+        self.indices = np.array([asteroid.index for asteroid in asteroids], dtype=np.int64)
+
+        # Integer radius and color class of every asteroid, as drawn by Asteroid.draw
+        self.sizes = np.array([max(1, int(asteroid.radius)) for asteroid in asteroids], dtype=np.int64)
+        self.colors = sorted({asteroid.color for asteroid in asteroids})
+        color_ids = {color: i for i, color in enumerate(self.colors)}
+        self.color_ids = np.array([color_ids[asteroid.color] for asteroid in asteroids], dtype=np.int64)
+
+        self._state = asteroids[0]._state if asteroids else None
+        self._sprites = {}
+
+    def _sprite(self, radius, color_id):
+        """Pre-rendered circle of the given radius and color."""
+        key = (radius, color_id)
+        if key not in self._sprites:
+            sprite = pygame.Surface((2 * radius, 2 * radius), pygame.SRCALPHA)
+            pygame.draw.circle(sprite, self.colors[color_id], (radius, radius), radius)
+            self._sprites[key] = sprite
+        return self._sprites[key]
+
+    def draw(self, surface, scale, screen_offset_x=0, screen_offset_y=0, screen=None):
+        """Draw all asteroids; `screen` are the screen positions of all bodies if already projected (Camera.update)."""
+        if not len(self.indices):
+            return
+        width, height = surface.get_size()
+
+        # Project all asteroids to screen space at once
+        if screen is not None:
+            x = screen[self.indices, 0].astype(np.int64)
+            y = screen[self.indices, 1].astype(np.int64)
+        else:
+            positions = self._state.render_positions[self.indices]
+            x = (positions[:, 0] * scale + (constants.WIDTH / 2 + screen_offset_x)).astype(np.int64)
+            y = (positions[:, 1] * scale + (constants.HEIGHT / 2 + screen_offset_y)).astype(np.int64)
+
+        # Cull everything whose footprint is not fully on screen
+        visible = (x >= self.sizes) & (x < width) & (y >= self.sizes) & (y < height)
+
+        # Radius-1 points: write the 2x2 footprint directly into the pixels
+        small = visible & (self.sizes == 1)
+        if small.any():
+            xs, ys = x[small], y[small]
+            mapped = np.array([surface.map_rgb(color) for color in self.colors], dtype=np.uint32)
+            values = mapped[self.color_ids[small]]
+            pixels = pygame.surfarray.pixels2d(surface)
+            for dx in (-1, 0):
+                for dy in (-1, 0):
+                    pixels[xs + dx, ys + dy] = values
+            del pixels  # Unlock the surface
+
+        # Larger asteroids: stamp pre-rendered sprites in one call
+        large = np.flatnonzero(visible & (self.sizes > 1))
+        if len(large):
+            surface.blits([
+                (self._sprite(int(self.sizes[i]), int(self.color_ids[i])),
+                 (int(x[i]) - int(self.sizes[i]), int(y[i]) - int(self.sizes[i])))
+                for i in large
+            ], doreturn=False)
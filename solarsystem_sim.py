@@ -1,9 +1,19 @@
 # solarsystem_sim.py
 
 import constants
-import pygame
+import datetime
+import functools
 import math
 import itertools
+import time
+import numpy as np
+from solarsystem_backends import get_backend
+from solarsystem_state import StateStore, KIND_BODY, KIND_SUN, KIND_PLANET, KIND_ASTEROID, FLAG_DRAW_LINE
+from solarsystem_gravity import GravityEngine
+from solarsystem_integrators import get_integrator, leapfrog_step, block_leapfrog_step, orbital_time_scales
+from solarsystem_kepler import KeplerOrbits
+from solarsystem_parallel import ShardedPropagator, SHARDABLE_INTEGRATORS
+from solarsystem_trails import TrailBuffer, fade_palette, draw_trail
 
 
 # Solar system bodies
@@ -15,28 +25,108 @@ class Body:
     # DEFAULT_SCALE = constants.DEFAULT_SCALE
     TIMESTEP = constants.TIMESTEP
 
+    # Shared state store, bodies are handles into its arrays.
+    # Assign a new StateStore before creating a fresh solar system.
+    STATE = StateStore()
+    KIND = KIND_BODY
+    TRAIL_LENGTH = constants.TRAIL_LENGTH  # Trail capacity, override per class or use set_trail_length
+
     def __init__(self, x, y, radius, mass):
-        self.x = x
-        self.y = y
-        self.radius = radius
-        self.mass = mass
+        self._state = Body.STATE
+        self.index = self._state.add(x, y, radius, mass, kind=self.KIND)
 
         self.color = (0, 0, 0)
 
         self.sun = False
-        self.distance_to_sun = 0
 
         # Metadata for HUD calculations
         self.perihelion = None
         self.aphelion = None
 
-        self.orbit = []
-
-        self.x_vel = 0.0
-        self.y_vel = 0.0
+        self.orbit = TrailBuffer(self.TRAIL_LENGTH)
 
         self.draw_line = True
 
+    # State accessors (views into the state store)
+    @property
+    def x(self):
+        return float(self._state.pos[self.index, 0])
+
+    @x.setter
+    def x(self, value):
+        self._state.pos[self.index, 0] = value
+
+    @property
+    def y(self):
+        return float(self._state.pos[self.index, 1])
+
+    @y.setter
+    def y(self, value):
+        self._state.pos[self.index, 1] = value
+
+    @property
+    def x_vel(self):
+        return float(self._state.vel[self.index, 0])
+
+    @x_vel.setter
+    def x_vel(self, value):
+        self._state.vel[self.index, 0] = value
+
+    @property
+    def y_vel(self):
+        return float(self._state.vel[self.index, 1])
+
+    @y_vel.setter
+    def y_vel(self, value):
+        self._state.vel[self.index, 1] = value
+
+    @property
+    def mass(self):
+        return float(self._state.mass[self.index])
+
+    @mass.setter
+    def mass(self, value):
+        self._state.mass[self.index] = value
+
+    @property
+    def radius(self):
+        return float(self._state.radius[self.index])
+
+    @radius.setter
+    def radius(self, value):
+        self._state.radius[self.index] = value
+
+    @property
+    def distance_to_sun(self):
+        sun = self._state.sun_index()
+        if sun is None:
+            return 0
+        positions = self._state.render_positions
+        dx, dy = positions[self.index] - positions[sun]
+        return math.hypot(dx, dy)
+
+    @property
+    def draw_line(self):
+        return bool(self._state.flags[self.index] & FLAG_DRAW_LINE)
+
+    @draw_line.setter
+    def draw_line(self, value):
+        if value:
+            self._state.flags[self.index] |= FLAG_DRAW_LINE
+        else:
+            self._state.flags[self.index] &= ~FLAG_DRAW_LINE & 0xFF
+
+
+    def set_trail_length(self, length):
+        """Give this body a trail buffer with a different capacity (clears the trail)."""
+        self.orbit = TrailBuffer(length)
+
+    def screen_position(self, scale, screen_offset_x=0, screen_offset_y=0):
+        """Screen coordinates of the body in the currently rendered state."""
+        px, py = self._state.render_positions[self.index]
+        x = px * scale + constants.WIDTH / 2 + screen_offset_x
+        y = py * scale + constants.HEIGHT / 2 + screen_offset_y
+        return x, y
 
     def attraction(self, other):
         """Calculate the forces in x and y direction"""        
@@ -48,8 +138,6 @@ class Body:
         # Total Distance
         distance = math.sqrt(distance_x**2 + distance_y**2)
         
-        if other.sun:
-            self.distance_to_sun = distance
         # Force
         force = self.G * self.mass * other.mass / distance**2
         # Angle
@@ -82,45 +170,48 @@ class Body:
         self.x += self.x_vel * self.TIMESTEP
         self.y += self.y_vel * self.TIMESTEP
 
-        # Append current position to the orbit
-        self.orbit.append((self.x, self.y))
+        sun = next((body for body in current_solarsystem if body.sun), None)
+        self.record_step(self.x, self.y, None if sun is None else (sun.x, sun.y))
+
+    def record_step(self, x, y, sun_position=None):
+        """Bookkeeping after the body has moved to (x, y) (trail, orbit tracking)."""
+        # Append the position to the orbit, the ring buffer drops the oldest point
+        self.orbit.append(x, y)
+
+    def record_steps(self, points, sweep=None, angle=None):
+        """Bookkeeping for several steps at once: `points` (oldest first) go to the trail.
+
+        `sweep` is the angle swept around the Sun over the steps and `angle`
+        the angle after the last one, used by bodies that count orbits.
+        """
+        self.orbit.extend(points)
 
-        # General limit for orbit length for all bodies
-        general_trail_length = 20000  # Maximum points in the orbit for all bodies
-        if len(self.orbit) > general_trail_length:
-            self.orbit.pop(0)
+    def trail_palette(self):
+        """Colors of the orbit trail from the oldest to the newest end."""
+        fade_scale = 1.5  # Adjust this value to control brightness
+        return fade_palette(self.color, fade_scale)
+
+    def draw(self, DISPLAYSURF, scale, screen_offset_x=0, screen_offset_y=0, with_trail=True, position=None):
+        """Draw the body and its faded orbit trail (unless a TrailLayer draws the trails).
+
+        `position` are the screen coordinates if they were already projected
+        (Camera.update).
+        """
+        import pygame  # Only loaded once something is drawn, headless runs skip it
 
-    def draw(self, DISPLAYSURF, scale, screen_offset_x=0, screen_offset_y=0):
-        """Draw the body and its faded orbit trail."""
         # Calculate position on screen
-        x = self.x * scale + constants.WIDTH / 2 + screen_offset_x
-        y = self.y * scale + constants.HEIGHT / 2 + screen_offset_y
+        x, y = self.screen_position(scale, screen_offset_x, screen_offset_y) if position is None else position
 
         # Draw the faded orbit trail
-        if self.draw_line and len(self.orbit) >= 2:
-            fade_scale = 1.5  # Adjust this value to control brightness
-            orbit_points = [
-                (
-                    px * scale + constants.WIDTH / 2 + screen_offset_x,
-                    py * scale + constants.HEIGHT / 2 + screen_offset_y
-                )
-                for px, py in self.orbit
-            ]
-            for i in range(1, len(orbit_points)):
-                distance = len(orbit_points) - i
-                fade_factor = max(0, min(255, int(255 * (distance / len(orbit_points)) * fade_scale)))
-                faded_color = (
-                    int(self.color[0] * (1 - fade_factor / 255) + constants.COLOR_BACKGROUND[0] * (fade_factor / 255)),
-                    int(self.color[1] * (1 - fade_factor / 255) + constants.COLOR_BACKGROUND[1] * (fade_factor / 255)),
-                    int(self.color[2] * (1 - fade_factor / 255) + constants.COLOR_BACKGROUND[2] * (fade_factor / 255))
-                )
-                pygame.draw.line(DISPLAYSURF, faded_color, orbit_points[i - 1], orbit_points[i], 1)
+        if with_trail and self.draw_line and len(self.orbit) >= 2:
+            draw_trail(DISPLAYSURF, self.orbit, self.trail_palette(), scale, screen_offset_x, screen_offset_y)
 
         # Draw the body (planet or sun)
         pygame.draw.circle(DISPLAYSURF, self.color, (int(x), int(y)), int(self.radius))
     
 # Sun
 class Sun(Body):
+    KIND = KIND_SUN
 
     def __init__(self, x, y, radius, mass):
         super().__init__(x, y, radius, mass)
@@ -129,12 +220,14 @@ class Sun(Body):
         self.color = constants.COLOR_SUN
         self.orbit_count = 0  # Sun doesn't orbit but needs the attribute
 
-    def draw(self, DISPLAYSURF, scale, screen_offset_x=0, screen_offset_y=0):
-        super().draw(DISPLAYSURF, scale, screen_offset_x, screen_offset_y)
+    def draw(self, DISPLAYSURF, scale, screen_offset_x=0, screen_offset_y=0, with_trail=True, position=None):
+        super().draw(DISPLAYSURF, scale, screen_offset_x, screen_offset_y, with_trail, position)
 
 
 # Planets
 class Planet(Body):
+    KIND = KIND_PLANET
+    PRINT_ORBITS = True  # Print a message for every completed orbit
     cycle_colors = itertools.cycle([
         constants.COLOR_MERCURY,    # Mercury
         constants.COLOR_VENUS,      # Venus
@@ -173,18 +266,23 @@ class Planet(Body):
         # Call the update_position method from Body to handle physics
         super().update_position(current_solarsystem)
 
+    def record_step(self, x, y, sun_position=None):
+        """Update the trail, then count orbits and the flash timer."""
+        super().record_step(x, y, sun_position)
+
         # Check if the planet has completed a full orbit
-        sun = next((body for body in current_solarsystem if getattr(body, "sun", False)), None)
-        if sun is not None:
-            self._check_orbit_completion(sun)
+        if sun_position is not None:
+            self._check_orbit_completion(x, y, sun_position)
 
-        # Update the flash timer if it's active
-        if self.flash_timer > 0:
-            self.flash_timer -= 1
+    def record_steps(self, points, sweep=None, angle=None):
+        """Extend the trail, then count the orbits completed over the steps."""
+        super().record_steps(points, sweep, angle)
+        if sweep is not None:
+            self._count_orbits(sweep, angle)
 
-    def _check_orbit_completion(self, sun):
+    def _check_orbit_completion(self, x, y, sun_position):
         """Count completed orbits by tracking angular sweep around the Sun."""
-        current_angle = math.atan2(self.y - sun.y, self.x - sun.x)
+        current_angle = math.atan2(y - sun_position[1], x - sun_position[0])
 
         # Normalize delta to [-pi, pi] to handle angle wraparound at +/-pi.
         delta = current_angle - self.previous_angle
@@ -192,8 +290,11 @@ class Planet(Body):
             delta -= 2 * math.pi
         elif delta < -math.pi:
             delta += 2 * math.pi
+        self._count_orbits(delta, current_angle)
 
-        self.accumulated_angle += delta
+    def _count_orbits(self, sweep, current_angle):
+        """Add an angle swept around the Sun, ending at `current_angle`, and count completed orbits."""
+        self.accumulated_angle += sweep
         completed_orbits = int(abs(self.accumulated_angle) / (2 * math.pi))
 
         if completed_orbits > 0:
@@ -201,47 +302,31 @@ class Planet(Body):
             # Keep remainder to preserve progress toward the next orbit.
             self.accumulated_angle = math.fmod(self.accumulated_angle, 2 * math.pi)
             self.flash_timer = self.flash_duration
-            print(f"{self.name} completed orbit #{self.orbit_count}")
+            if self.PRINT_ORBITS:
+                print(f"{self.name} completed orbit #{self.orbit_count}")
 
         self.previous_angle = current_angle
 
-    def draw(self, DISPLAYSURF, scale, screen_offset_x=0, screen_offset_y=0):
-        """Draw the body with its orbit trail."""
+    def trail_palette(self):
+        """Trail colors, darker with every completed orbit."""
+        # Calculate the fade factor based on orbit count
+        # Each completed orbit makes the trail 10% darker
+        orbit_fade_multiplier = max(0.1, 1.0 - (self.orbit_count * 0.1))
+
+        fade_scale = 1.0  # Adjust this value to control brightness
+        # Trail colors combine the distance fade and the orbit count fade
+        return fade_palette(self.color, fade_scale, orbit_fade_multiplier)
+
+    def draw(self, DISPLAYSURF, scale, screen_offset_x=0, screen_offset_y=0, with_trail=True, position=None):
+        """Draw the body with its orbit trail (unless a TrailLayer draws the trails)."""
+        import pygame
+
         # Calculate position on screen
-        x = self.x * scale + constants.WIDTH / 2 + screen_offset_x
-        y = self.y * scale + constants.HEIGHT / 2 + screen_offset_y
+        x, y = self.screen_position(scale, screen_offset_x, screen_offset_y) if position is None else position
         
         # Draw orbit trail with fade effect
-        if self.draw_line and len(self.orbit) >= 2:
-            # Calculate the fade factor based on orbit count
-            # Each completed orbit makes the trail 10% darker
-            orbit_fade_multiplier = max(0.1, 1.0 - (self.orbit_count * 0.1))
-            
-            fade_scale = 1.0  # Adjust this value to control brightness
-            orbit_points = [
-                (
-                    px * scale + constants.WIDTH / 2 + screen_offset_x,
-                    py * scale + constants.HEIGHT / 2 + screen_offset_y
-                )
-                for px, py in self.orbit
-            ]
-            
-            # Draw the trail with both distance fade and orbit count fade
-            for i in range(1, len(orbit_points)):
-                # Distance-based fade (older parts of trail are more faded)
-                distance = len(orbit_points) - i
-                distance_fade_factor = max(0, min(255, int(255 * (distance / len(orbit_points)) * fade_scale)))
-                
-                # Combine orbit count fade with distance fade
-                combined_fade = orbit_fade_multiplier * (1 - distance_fade_factor / 255)
-                
-                faded_color = (
-                    int(self.color[0] * combined_fade + constants.COLOR_BACKGROUND[0] * (1 - combined_fade)),
-                    int(self.color[1] * combined_fade + constants.COLOR_BACKGROUND[1] * (1 - combined_fade)),
-                    int(self.color[2] * combined_fade + constants.COLOR_BACKGROUND[2] * (1 - combined_fade))
-                )
-                
-                pygame.draw.line(DISPLAYSURF, faded_color, orbit_points[i - 1], orbit_points[i], 1)
+        if with_trail and self.draw_line and len(self.orbit) >= 2:
+            draw_trail(DISPLAYSURF, self.orbit, self.trail_palette(), scale, screen_offset_x, screen_offset_y)
         
         # Draw the planet itself
         pygame.draw.circle(DISPLAYSURF, self.color, (int(x), int(y)), int(self.radius))
@@ -258,7 +343,13 @@ class Planet(Body):
             # Draw as a ring (not filled)
             pygame.draw.circle(DISPLAYSURF, flash_color, (int(x), int(y)), flash_radius, 2)
 
+            # Count the flash down per rendered frame
+            self.flash_timer -= 1
+
 class Asteroid(Body):
+    KIND = KIND_ASTEROID
+    TRAIL_LENGTH = 0  # No trail storage unless enabled with set_trail_length
+
     def __init__(self, x, y, radius, mass, color=(192, 192, 192)):
         super().__init__(x, y, radius, mass)
         self.sun = False
@@ -266,10 +357,11 @@ class Asteroid(Body):
         self.color = color  # Set asteroid color
         self.draw_line = False # Asteroids don't need orbit trails
     
-    def draw(self, DISPLAYSURF, scale, screen_offset_x=0, screen_offset_y=0):
+    def draw(self, DISPLAYSURF, scale, screen_offset_x=0, screen_offset_y=0, with_trail=True, position=None):
         """Optimized draw for asteroids"""
-        x = self.x * scale + constants.WIDTH / 2 + screen_offset_x
-        y = self.y * scale + constants.HEIGHT / 2 + screen_offset_y
+        import pygame
+
+        x, y = self.screen_position(scale, screen_offset_x, screen_offset_y) if position is None else position
         
         # Only draw if on screen (culling)
         if 0 <= x <= constants.WIDTH and 0 <= y <= constants.HEIGHT:
@@ -285,4 +377,331 @@ class Asteroid(Body):
         self.y_vel += fy / self.mass * self.TIMESTEP
         self.x += self.x_vel * self.TIMESTEP
         self.y += self.y_vel * self.TIMESTEP
-        # No orbit trail needed
\ No newline at end of file
+
+    def record_step(self, x, y, sun_position=None):
+        """No orbit trail needed"""
+        pass
+
+    def record_steps(self, points, sweep=None, angle=None):
+        """No orbit trail needed"""
+        pass
+
+
+def wrap_angle(angle):
+    """Angles wrapped to [-pi, pi), elementwise."""
+    return (angle + math.pi) % (2 * math.pi) - math.pi
+
+
+# Simulation driver
+class Simulation:
+    """Advance all bodies of the shared state store together.
+
+    Every step moves all bodies synchronously with the selected integrator,
+    then lets planets update their trails and orbit counters.
+
+    With `kepler` enabled, asteroids and TNOs that are test particles on
+    bound orbits follow analytic two-body orbits around the Sun instead
+    (like `Asteroid.update_position`, they only feel the Sun). Only the
+    remaining bodies are integrated.
+
+    With `processes` above one, the integrated test particles are advanced by
+    that many worker processes on shared memory (see solarsystem_parallel),
+    while the massive bodies are stepped here. Call close() when done.
+
+    `backend` names the compute backend for forces and Kepler's equation
+    (default: $SOLARSYSTEM_BACKEND or constants.DEFAULT_BACKEND).
+    """
+
+    def __init__(self, bodies, integrator=constants.DEFAULT_INTEGRATOR,
+                 mass_threshold=constants.MASSIVE_BODY_THRESHOLD, self_gravity=False,
+                 opening_angle=constants.BARNES_HUT_OPENING_ANGLE, kepler=False, processes=1,
+                 backend=None):
+        self.bodies = bodies
+        self.state = Body.STATE
+        self.integrator_name = integrator
+        self.integrator = get_integrator(integrator)
+        self.sun = next((body for body in bodies if body.sun), None)
+        self.backend = get_backend(backend)
+
+        self.elapsed_time = 0.0  # Total simulated time in seconds
+        self.step_count = 0
+
+        # Analytic orbits for the Kepler particles, the rest is integrated
+        self.kepler = None
+        self.dynamic = None
+        if kepler:
+            if self_gravity:
+                raise ValueError("Kepler propagation cannot be combined with self-gravity")
+            self._setup_kepler(mass_threshold)
+
+        # Test particles advanced by worker processes
+        self.particles = None
+        if processes > 1:
+            if self_gravity:
+                raise ValueError("Sharded propagation cannot be combined with self-gravity")
+            if integrator not in SHARDABLE_INTEGRATORS:
+                raise ValueError(f"Sharded propagation needs a fixed-step integrator: {', '.join(SHARDABLE_INTEGRATORS)}")
+            self._setup_particles(mass_threshold, processes)
+        self.gravity = GravityEngine(self.state, mass_threshold, self_gravity=self_gravity,
+                                     opening_angle=opening_angle, bodies=self.dynamic,
+                                     backend=self.backend.name)
+
+        # The Sun among the integrated bodies, the block integrator measures orbits against it
+        self.reference = self._integrated_index(self.state.sun_index())
+
+        # Bodies that keep trails or count orbits after each step
+        self.tracked_bodies = [body for body in bodies if not isinstance(body, Asteroid)]
+        self.tracked = np.array([body.index for body in self.tracked_bodies], dtype=np.int64)
+        self._tracked_sun = next((i for i, body in enumerate(self.tracked_bodies) if body is self.sun), None)
+
+        # Optional TrajectoryRecorder, gets the positions after every step
+        self.recorder = None
+
+    def step(self, dt=None, integrator=None, record=True, place_kepler=True):
+        """Advance the simulation by one time step (default `Body.TIMESTEP`).
+
+        With `record` false, the trails and orbit counters are not updated,
+        the caller passes `state.positions[self.tracked]` to record_steps()
+        later (SimulationWorker does so from the render thread). With
+        `place_kepler` false, the Kepler particles keep their positions until
+        the next step that places them; nothing else depends on them.
+        """
+        if dt is None:
+            dt = Body.TIMESTEP
+        integrator = integrator or self.integrator
+        if integrator is block_leapfrog_step:
+            integrator = functools.partial(block_leapfrog_step, reference=self.reference)
+        state = self.state
+        if self.dynamic is None:
+            integrator(state.positions, state.velocities, dt, self.gravity.accelerations)
+        else:
+            accel = self.gravity.accelerations
+            if self.particles is not None:
+                accel = self.particles.recording(accel)
+            pos = state.positions[self.dynamic]
+            vel = state.velocities[self.dynamic]
+            integrator(pos, vel, dt, accel)
+            state.positions[self.dynamic] = pos
+            state.velocities[self.dynamic] = vel
+
+            # The workers run while the Kepler particles are placed
+            if self.particles is not None:
+                self.particles.start(dt, integrator)
+            if self.kepler is not None:
+                self.kepler_time += dt
+                if place_kepler:
+                    self._propagate_kepler(self.kepler_time)
+            if self.particles is not None:
+                self.particles.wait()
+
+        if record:
+            self.record_steps(state.positions[np.newaxis, self.tracked])
+
+        self.elapsed_time += dt
+        self.step_count += 1
+        if self.recorder is not None:
+            self.recorder.append(self.state.positions, self.elapsed_time)
+
+    def tracked_angles(self, positions):
+        """Angles around the Sun of tracked-body positions, shape (..., len(tracked_bodies), 2), or None without a Sun."""
+        if self._tracked_sun is None:
+            return None
+        relative = positions - positions[..., self._tracked_sun, np.newaxis, :]
+        return np.arctan2(relative[..., 1], relative[..., 0])
+
+    def record_steps(self, steps, sweeps=None, angles=None):
+        """Update trails and orbit counters for several steps at once.
+
+        `steps` are the positions of the tracked bodies after each step,
+        shape (steps, len(tracked_bodies), 2), oldest first. `sweeps` are the
+        angles every body swept around the Sun over the steps and `angles`
+        its angle after the last one; both are computed from `steps` if not
+        given (SimulationWorker passes them when it kept fewer steps than it
+        took).
+        """
+        if len(steps) == 0:
+            return
+        if len(steps) == 1 and sweeps is None:
+            # A single step, as after every step(), is cheaper one body at a time
+            positions = steps[0].tolist()
+            sun_position = None if self._tracked_sun is None else positions[self._tracked_sun]
+            for body, (x, y) in zip(self.tracked_bodies, positions):
+                body.record_step(x, y, sun_position)
+            return
+        if sweeps is None:
+            angles = self.tracked_angles(steps)
+            if angles is not None:
+                previous = np.array([getattr(body, "previous_angle", 0.0) for body in self.tracked_bodies])
+                sweeps = wrap_angle(np.diff(angles, axis=0, prepend=previous[np.newaxis])).sum(axis=0)
+                angles = angles[-1]
+        for i, body in enumerate(self.tracked_bodies):
+            if sweeps is None:
+                body.record_steps(steps[:, i])
+            else:
+                body.record_steps(steps[:, i], float(sweeps[i]), float(angles[i]))
+
+    def current_date(self):
+        """Date and time of the current state, or None if the epoch is unknown."""
+        if self.state.epoch is None:
+            return None
+        start = datetime.datetime.combine(self.state.epoch, datetime.time(), tzinfo=datetime.timezone.utc)
+        return start + datetime.timedelta(seconds=self.elapsed_time)
+
+    def advance(self, duration, progress=None, steps_per_orbit=constants.FAST_FORWARD_STEPS_PER_ORBIT):
+        """Fast-forward the simulation by `duration` seconds.
+
+        The block integrator is used whatever integrator is selected, so every
+        body is sub-stepped to BLOCK_STEPS_PER_ORBIT accuracy on its own level,
+        while the block step gives the fastest body around the Sun only
+        `steps_per_orbit` steps per orbit, but is never shorter than
+        `Body.TIMESTEP`. Sharded particles need a fixed step, with them
+        leapfrog runs at BLOCK_STEPS_PER_ORBIT instead. `progress(fraction)`
+        is called about every FAST_FORWARD_PROGRESS_INTERVAL seconds of wall
+        time.
+
+        Between the steps only the angles swept around the Sun are summed,
+        the orbit counters are updated once at the end and the Kepler
+        particles are placed once (unless a recorder needs every step). The
+        trails are cleared afterwards, they would only show a coarse history.
+        """
+        if duration <= 0:
+            return
+        if self.particles is not None:
+            # Sharded particles need a fixed step, use leapfrog at the block accuracy
+            integrator = leapfrog_step
+            steps_per_orbit = max(steps_per_orbit, constants.BLOCK_STEPS_PER_ORBIT)
+            dt = 2 * math.pi * self._shortest_time_scale() / steps_per_orbit
+        else:
+            # Nothing moves the integrated bodies between the blocks, so each block
+            # starts from the accelerations the previous one ended with
+            end_acc = None
+
+            def integrator(pos, vel, dt, accel):
+                nonlocal end_acc
+                end_acc = block_leapfrog_step(pos, vel, dt, accel, reference=self.reference, acc=end_acc)
+
+            # Never finer than the interactive step, the block integrator sub-steps within it
+            dt = max(2 * math.pi * self._shortest_time_scale() / steps_per_orbit, abs(Body.TIMESTEP))
+        dt = min(duration, dt)
+        steps = math.ceil(duration / dt)
+        dt = duration / steps
+
+        place_kepler = self.recorder is not None
+        angles = self.tracked_angles(self.state.positions[self.tracked])
+        if angles is not None:
+            angles = np.array([getattr(body, "previous_angle", 0.0) for body in self.tracked_bodies])
+            sweeps = np.zeros(len(angles))
+
+        last_report = time.perf_counter()
+        for i in range(steps):
+            self.step(dt, integrator=integrator, record=False, place_kepler=place_kepler)
+            if angles is not None:
+                # Less than half an orbit per step, so the wrapped difference is the swept angle
+                current = self.tracked_angles(self.state.positions[self.tracked])
+                sweeps += wrap_angle(current - angles)
+                angles = current
+            if progress is not None and time.perf_counter() - last_report >= constants.FAST_FORWARD_PROGRESS_INTERVAL:
+                progress((i + 1) / steps)
+                last_report = time.perf_counter()
+        if self.kepler is not None and not place_kepler:
+            self._propagate_kepler(self.kepler_time)
+
+        # Hundreds of completed orbits are not worth a console line each
+        print_orbits = Planet.PRINT_ORBITS
+        Planet.PRINT_ORBITS = False
+        try:
+            positions = self.state.positions[np.newaxis, self.tracked]
+            if angles is None:
+                self.record_steps(positions)
+            else:
+                self.record_steps(positions, sweeps, angles)
+        finally:
+            Planet.PRINT_ORBITS = print_orbits
+
+        for body in self.tracked_bodies:
+            body.orbit.clear()
+            if isinstance(body, Planet):
+                body.flash_timer = 0
+        if progress is not None:
+            progress(1.0)
+
+    def advance_to(self, date, progress=None):
+        """Fast-forward to a date (datetime.date or datetime.datetime, UTC)."""
+        current = self.current_date()
+        if current is None:
+            raise ValueError("The simulation has no epoch, use advance() with a duration")
+        if not isinstance(date, datetime.datetime):
+            date = datetime.datetime.combine(date, datetime.time())
+        if date.tzinfo is None:
+            date = date.replace(tzinfo=datetime.timezone.utc)
+        duration = (date - current).total_seconds()
+        if duration < 0:
+            raise ValueError(f"{date:%Y-%m-%d} is before the current date {current:%Y-%m-%d}")
+        self.advance(duration, progress)
+
+    def _shortest_time_scale(self):
+        """Smallest orbital time scale |v| / |a| around the Sun of the integrated bodies (period / 2 pi)."""
+        state = self.state
+        pos = state.positions if self.dynamic is None else state.positions[self.dynamic]
+        vel = state.velocities if self.dynamic is None else state.velocities[self.dynamic]
+        acc = self.gravity.accelerations(pos)
+        return orbital_time_scales(vel, acc, self.reference).min(initial=np.inf)
+
+    def _integrated_index(self, index):
+        """Position of store index `index` among the integrated bodies, or None."""
+        if index is None or self.dynamic is None:
+            return index
+        found = np.flatnonzero(self.dynamic == index)
+        return int(found[0]) if len(found) else None
+
+    def _setup_kepler(self, mass_threshold):
+        """Convert the eligible test particles to orbital elements."""
+        state = self.state
+        sun = state.sun_index()
+        if sun is None:
+            raise ValueError("Kepler propagation needs a Sun")
+        candidates = np.flatnonzero((state.kinds == KIND_ASTEROID) & (state.masses < mass_threshold))
+
+        mu = constants.G * state.masses[sun]
+        rel_pos = state.positions[candidates] - state.positions[sun]
+        rel_vel = state.velocities[candidates] - state.velocities[sun]
+        bound = KeplerOrbits(rel_pos, rel_vel, mu).bound()
+
+        self.kepler_bodies = candidates[bound]
+        self.kepler = KeplerOrbits(rel_pos[bound], rel_vel[bound], mu, solver=self.backend.solve_kepler)
+        self.kepler_time = 0.0  # Simulated time since the elements were computed
+        is_dynamic = np.ones(state.count, dtype=bool)
+        is_dynamic[self.kepler_bodies] = False
+        self.dynamic = np.flatnonzero(is_dynamic)
+        self._sun_index = sun
+
+    def _setup_particles(self, mass_threshold, processes):
+        """Hand the integrated test particles to worker processes."""
+        state = self.state
+        dynamic = np.arange(state.count) if self.dynamic is None else self.dynamic
+        is_test = state.masses[dynamic] < mass_threshold
+        if not is_test.any():
+            return
+        self.dynamic = dynamic[~is_test]
+        self.particles = ShardedPropagator(state, dynamic[is_test], self.dynamic, processes,
+                                           backend=self.backend.name)
+
+    def close(self):
+        """Stop the particle worker processes, if any. Particles stay where they are."""
+        if self.particles is not None:
+            self.particles.close()
+            self.particles = None
+
+    def _propagate_kepler(self, time):
+        """Place the Kepler particles on their orbits around the current Sun."""
+        state = self.state
+        rel_pos, rel_vel = self.kepler.state_at(time)
+        sun = self._sun_index
+        state.positions[self.kepler_bodies] = state.positions[sun] + rel_pos
+        state.velocities[self.kepler_bodies] = state.velocities[sun] + rel_vel
+
+
+if __name__ == "__main__":
+    # Headless batch runs: python -m solarsystem_sim run --years 1000
+    import solarsystem_batch
+    solarsystem_batch.main()
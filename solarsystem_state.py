@@ -0,0 +1,134 @@
+# solarsystem_state.py
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Body kinds
+KIND_BODY = 0
+KIND_SUN = 1
+KIND_PLANET = 2
+KIND_ASTEROID = 3
+
+# Body flags (bit mask)
+FLAG_DRAW_LINE = 1
+
+
+class StateStore:
+    """Central structure-of-arrays store for the state of all bodies.
+
+    Positions and velocities are (N, 2) float64 arrays, mass and radius are
+    float64 arrays and kind/flags are small integer arrays. Only the first
+    `count` rows are in use; the arrays grow geometrically as bodies are added.
+    """
+
+    def __init__(self, capacity=512):
+        self.count = 0
+        self.pos = np.zeros((capacity, 2))
+        self.vel = np.zeros((capacity, 2))
+        self.mass = np.zeros(capacity)
+        self.radius = np.zeros(capacity)
+        self.kind = np.zeros(capacity, dtype=np.int8)
+        self.flags = np.zeros(capacity, dtype=np.uint8)
+
+        # Positions published by a background simulation worker, drawn
+        # instead of the live positions while a worker is running
+        self.snapshot = None
+
+        # Date of the initial state (datetime.date), set by create_solarsystem
+        self.epoch = None
+
+        # Shared memory blocks holding pos and vel, see share_memory()
+        self.shared = None
+
+    def __len__(self):
+        return self.count
+
+    def add(self, x, y, radius, mass, kind=KIND_BODY):
+        """Append a body to the store and return its index."""
+        if self.count == len(self.mass):
+            self._grow(2 * len(self.mass))
+
+        index = self.count
+        self.pos[index] = (x, y)
+        self.vel[index] = (0.0, 0.0)
+        self.mass[index] = mass
+        self.radius[index] = radius
+        self.kind[index] = kind
+        self.flags[index] = 0
+        self.count += 1
+        return index
+
+    def _grow(self, capacity):
+        """Reallocate all arrays with a larger capacity, keeping the contents."""
+        if self.shared is not None:
+            raise RuntimeError("Cannot add bodies while the state is in shared memory")
+        for name in ("pos", "vel", "mass", "radius", "kind", "flags"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def share_memory(self):
+        """Move positions and velocities into shared memory for worker processes.
+
+        Returns the (pos, vel) SharedMemory blocks, other processes attach
+        to them by name. No bodies can be added until release_shared_memory().
+        """
+        if self.shared is None:
+            blocks = []
+            for name in ("pos", "vel"):
+                old = getattr(self, name)
+                block = shared_memory.SharedMemory(create=True, size=max(old.nbytes, 1))
+                new = np.ndarray(old.shape, dtype=old.dtype, buffer=block.buf)
+                new[:] = old
+                setattr(self, name, new)
+                blocks.append(block)
+            self.shared = tuple(blocks)
+        return self.shared
+
+    def release_shared_memory(self):
+        """Copy positions and velocities back to private memory and free the blocks."""
+        if self.shared is None:
+            return
+        self.pos = self.pos.copy()
+        self.vel = self.vel.copy()
+        for block in self.shared:
+            block.unlink()
+            try:
+                block.close()
+            except BufferError:
+                pass  # Views still in use, the mapping is freed with them
+        self.shared = None
+
+    # Views on the rows in use. Take them again after adding bodies,
+    # since growing the store reallocates the underlying arrays.
+    @property
+    def positions(self):
+        return self.pos[:self.count]
+
+    @property
+    def velocities(self):
+        return self.vel[:self.count]
+
+    @property
+    def masses(self):
+        return self.mass[:self.count]
+
+    @property
+    def radii(self):
+        return self.radius[:self.count]
+
+    @property
+    def kinds(self):
+        return self.kind[:self.count]
+
+    @property
+    def render_positions(self):
+        """Positions to draw: the latest snapshot if there is one, else the live state."""
+        return self.snapshot if self.snapshot is not None else self.positions
+
+    def sun_index(self):
+        """Index of the Sun, or None if there is no Sun in the store."""
+        indices = np.flatnonzero(self.kinds == KIND_SUN)
+        return int(indices[0]) if len(indices) else None
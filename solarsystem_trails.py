@@ -0,0 +1,366 @@
+# solarsystem_trails.py
+
+import constants
+import functools
+import numpy as np
+
+
+class TrailBuffer:
+    """Fixed-capacity ring buffer of orbit trail points.
+
+    Every point is written twice, at `head` and `head + capacity`, so the
+    most recent points are always one contiguous slice of the storage. That
+    keeps appends O(1) and `ordered()` a zero-copy view.
+    """
+
+    def __init__(self, capacity, dtype=np.float32):
+        self.capacity = capacity
+        self.points = np.zeros((2 * capacity, 2), dtype=dtype)
+        self.head = 0  # Next write position in [0, capacity)
+        self.size = 0
+        self.total = 0  # Points appended since creation or the last clear
+        self.generation = 0  # Counts changes other than appends (clear, truncate, restore)
+        self.lod = None  # Simplified copy for drawing, created on demand
+
+    def __len__(self):
+        return self.size
+
+    def append(self, x, y):
+        """Add a point, dropping the oldest one once the buffer is full."""
+        if self.capacity == 0:
+            return
+        head = self.head
+        self.points[head] = (x, y)
+        self.points[head + self.capacity] = (x, y)
+        self.head = (head + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+        self.total += 1
+
+    def ordered(self):
+        """View of the stored points from oldest to newest, shape (size, 2)."""
+        end = self.head + self.capacity
+        return self.points[end - self.size:end]
+
+    def clear(self):
+        self.head = 0
+        self.size = 0
+        self.total = 0
+        self.generation += 1
+
+    def extend(self, points):
+        """Append several points (oldest first) at once."""
+        count = len(points)
+        if self.capacity == 0 or count == 0:
+            return
+        if count == 1:
+            self.append(*points[0])
+            return
+        if count >= self.capacity:
+            self.restore(points, self.total + count)
+            return
+        index = (self.head + np.arange(count)) % self.capacity
+        self.points[index] = points
+        self.points[index + self.capacity] = points
+        self.head = (self.head + count) % self.capacity
+        self.size = min(self.size + count, self.capacity)
+        self.total += count
+
+    def truncate(self, count):
+        """Drop the `count` newest points."""
+        count = min(count, self.size)
+        if count == 0:
+            return
+        self.head = (self.head - count) % self.capacity
+        self.size -= count
+        self.total -= count
+        self.generation += 1
+
+    def restore(self, points, total):
+        """Refill the buffer with saved points (oldest first) and point count."""
+        points = points[len(points) - min(len(points), self.capacity):]
+        size = len(points)
+        self.points[:size] = points
+        self.points[self.capacity:self.capacity + size] = points
+        self.head = size % self.capacity if self.capacity else 0
+        self.size = size
+        self.total = max(total, size)
+        self.generation += 1
+        self.lod = None
+
+    def simplified(self, scale, tolerance=constants.TRAIL_LOD_TOLERANCE):
+        """Points to draw at this zoom level and their indices into `ordered()`."""
+        if tolerance <= 0:
+            return self.ordered(), np.arange(self.size)
+        if self.lod is None:
+            self.lod = SimplifiedTrail(self)
+        indices = self.lod.update(scale, tolerance)
+        return self.ordered()[indices], indices
+
+
+def simplify_polyline(points, starts, ends, tolerance):
+    """Indices of the polyline points to keep, in ascending order.
+
+    Every segment from `starts[i]` to `ends[i]` whose interior points are
+    farther than `tolerance` from its chord is split in half, until all
+    dropped points are within `tolerance` of the kept polyline. This is
+    Douglas-Peucker with midpoint splits, evaluated for all segments of a
+    level at once.
+    """
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+    kept = [starts, ends]
+
+    while len(starts):
+        interior_counts = ends - starts - 1
+        has_interior = interior_counts > 0
+        starts, ends = starts[has_interior], ends[has_interior]
+        interior_counts = interior_counts[has_interior]
+        if not len(starts):
+            break
+
+        # Flatten the interior points of all segments into one array
+        offsets = np.cumsum(interior_counts) - interior_counts
+        segment = np.repeat(np.arange(len(starts)), interior_counts)
+        interior = starts[segment] + 1 + np.arange(len(segment)) - offsets[segment]
+
+        # Distance of every interior point to its segment's chord
+        a = points[starts][segment]
+        ab = points[ends][segment] - a
+        ap = points[interior] - a
+        length2 = np.einsum("ij,ij->i", ab, ab)
+        t = np.divide(np.einsum("ij,ij->i", ap, ab), length2, out=np.zeros_like(length2), where=length2 > 0)
+        closest = ap - np.clip(t, 0, 1)[:, np.newaxis] * ab
+        error = np.maximum.reduceat(np.einsum("ij,ij->i", closest, closest), offsets)
+
+        split = error > tolerance * tolerance
+        middles = (starts[split] + ends[split]) // 2
+        kept.append(middles)
+        starts, ends = np.concatenate((starts[split], middles)), np.concatenate((middles, ends[split]))
+
+    return np.unique(np.concatenate(kept))
+
+
+class SimplifiedTrail:
+    """Screen-space level of detail for a TrailBuffer.
+
+    The trail is cut into chunks of TRAIL_LOD_CHUNK points aligned to the
+    absolute point count, and each completed chunk is simplified once with
+    `simplify_polyline`. Only the unfinished newest chunk is simplified on
+    every frame, and points leaving the ring buffer are dropped from the
+    front. The cache is rebuilt when the zoom changes by more than
+    TRAIL_LOD_ZOOM_STEP or the trail was cleared.
+    """
+
+    def __init__(self, trail):
+        self.trail = trail
+        self.seq = np.zeros(trail.capacity + 1, dtype=np.int64)  # Kept points of completed chunks
+        self.start = 0
+        self.end = 0
+        self.scale = None
+        self.tolerance = None  # In world units
+        self.begin = 0  # First chunk boundary covered by the cache
+        self.done = 0  # Chunks before this point count are simplified
+
+    def update(self, scale, tolerance):
+        """Return the indices into `ordered()` of the points to draw."""
+        trail = self.trail
+        chunk = constants.TRAIL_LOD_CHUNK
+        first = trail.total - trail.size
+
+        # Short trails are cheap enough to simplify as a whole
+        if trail.size <= 2 * chunk:
+            points = trail.ordered().astype(np.float64)
+            return simplify_polyline(points, [0], [len(points) - 1], tolerance / scale)
+
+        if (self.scale is None or trail.total < self.done or self.done < first
+                or not 1 / constants.TRAIL_LOD_ZOOM_STEP <= scale / self.scale <= constants.TRAIL_LOD_ZOOM_STEP):
+            self._rebuild(scale, tolerance, first)
+
+        # Forget kept points that are no longer in the ring buffer
+        self.start += int(np.searchsorted(self.seq[self.start:self.end], first))
+
+        ordered = trail.ordered()
+        self._simplify_completed_chunks(ordered, first)
+
+        parts = []
+        if self.begin > first:
+            # Oldest points before the first cached chunk
+            head = ordered[:self.begin - first + 1].astype(np.float64)
+            parts.append(simplify_polyline(head, [0], [len(head) - 1], self.tolerance))
+        else:
+            parts.append(np.zeros(1, dtype=np.int64))
+        parts.append(self.seq[self.start:self.end] - first)
+
+        # Newest, unfinished chunk up to the current position
+        tail = ordered[self.done - first:].astype(np.float64)
+        parts.append(simplify_polyline(tail, [0], [len(tail) - 1], self.tolerance) + (self.done - first))
+        return np.unique(np.concatenate(parts))
+
+    def _rebuild(self, scale, tolerance, first):
+        chunk = constants.TRAIL_LOD_CHUNK
+        self.scale = scale
+        self.tolerance = tolerance / scale
+        self.start = self.end = 0
+        self.begin = self.done = -(-first // chunk) * chunk
+
+    def _simplify_completed_chunks(self, ordered, first):
+        chunk = constants.TRAIL_LOD_CHUNK
+        last_boundary = (self.trail.total - 1) // chunk * chunk
+        if last_boundary <= self.done:
+            return
+
+        points = ordered[self.done - first:last_boundary - first + 1].astype(np.float64)
+        starts = np.arange(0, len(points) - 1, chunk)
+        kept = simplify_polyline(points, starts, starts + chunk, self.tolerance)
+        # A chunk's end point is the start of the next chunk
+        kept = kept[:-1] + self.done
+
+        # Move the live range to the front when the storage runs out
+        if self.end + len(kept) > len(self.seq):
+            live = self.end - self.start
+            self.seq[:live] = self.seq[self.start:self.end]
+            self.start, self.end = 0, live
+
+        self.seq[self.end:self.end + len(kept)] = kept
+        self.end += len(kept)
+        self.done = last_boundary
+
+
+@functools.lru_cache(maxsize=256)
+def fade_palette(color, fade_scale=1.0, orbit_fade=1.0, buckets=constants.TRAIL_FADE_BUCKETS,
+                 background=constants.COLOR_BACKGROUND):
+    """Precompute the trail colors from the oldest to the newest bucket.
+
+    The oldest end of the trail blends into the background, `fade_scale`
+    controls how fast it fades in and `orbit_fade` darkens the whole trail.
+    """
+    palette = []
+    for bucket in range(buckets):
+        age = 1 - (bucket + 0.5) / buckets  # 1 is the oldest end of the trail
+        weight = orbit_fade * (1 - min(1.0, age * fade_scale))
+        palette.append(tuple(int(c * weight + b * (1 - weight)) for c, b in zip(color, background)))
+    return tuple(palette)
+
+
+def draw_trail(surface, trail, palette, scale, screen_offset_x=0, screen_offset_y=0,
+               background=constants.COLOR_BACKGROUND):
+    """Draw a trail with one pygame.draw.lines call per fade bucket.
+
+    The trail is simplified to the screen-space tolerance first, the fade is
+    still computed from each point's position along the full trail.
+    """
+    import pygame  # Only loaded once something is drawn, headless runs skip it
+
+    count = len(trail)
+    if count < 2:
+        return
+    points, indices = trail.simplified(scale)
+
+    # Project all points to screen space at once
+    screen = points * scale
+    screen += (constants.WIDTH / 2 + screen_offset_x, constants.HEIGHT / 2 + screen_offset_y)
+
+    # Split the trail into consecutive, overlapping runs of points
+    bounds = np.linspace(0, count - 1, len(palette) + 1).astype(int)
+    bounds = np.searchsorted(indices, bounds)
+    bounds[-1] = len(points) - 1
+    for bucket, color in enumerate(palette):
+        start, end = bounds[bucket], bounds[bucket + 1]
+        # Skip empty runs and runs that are fully faded into the background
+        if end <= start or color == background:
+            continue
+        pygame.draw.lines(surface, color, False, screen[start:end + 1].tolist(), 1)
+
+
+class TrailLayer:
+    """Orbit trails of several bodies on a surface that is kept between frames.
+
+    A trail only grows by a point or two per frame, so only the newest
+    segments are drawn onto the layer, in the newest fade color. The layer
+    is larger than the screen by `margin` pixels on every side and is blitted
+    at the current pan offset, so it also replaces clearing the screen.
+
+    The layer is drawn again from scratch when the zoom changes, the view
+    was panned beyond the margin, a trail changed color (a completed orbit),
+    was cleared or shortened, or has grown by TRAIL_LAYER_REFRESH fade
+    buckets since the last redraw. The last rule keeps the fade along the
+    trail and the dropped oldest points up to date.
+    """
+
+    def __init__(self, bodies, margin=constants.TRAIL_LAYER_MARGIN, refresh=constants.TRAIL_LAYER_REFRESH,
+                 background=constants.COLOR_BACKGROUND):
+        import pygame  # Only loaded once something is drawn, headless runs skip it
+
+        self.bodies = bodies
+        self.margin = margin
+        self.refresh = refresh
+        self.background = background
+        self.surface = pygame.Surface((constants.WIDTH + 2 * margin, constants.HEIGHT + 2 * margin))
+        self.scale = None
+        self.offset = (0, 0)  # Pan offset the layer was drawn with
+        self.trails = {}  # Body -> (trail, generation, palette, total at the last redraw, total drawn)
+        self.redraws = 0
+
+    def _trail_state(self, body):
+        if not body.draw_line:
+            return None
+        return body.orbit, body.orbit.generation, body.trail_palette()
+
+    def _needs_redraw(self, scale, shift_x, shift_y):
+        if scale != self.scale or abs(shift_x) > self.margin or abs(shift_y) > self.margin:
+            return True
+        for body in self.bodies:
+            state = self._trail_state(body)
+            drawn = self.trails.get(body)
+            if state is None or drawn is None:
+                if state is not drawn:
+                    return True
+                continue
+            if state != drawn[:3] or body.orbit.total < drawn[4]:
+                return True
+            # Refresh the fade once the trail has moved on by `refresh` buckets
+            if body.orbit.total - drawn[3] > max(1.0, self.refresh * len(body.orbit) / len(state[2])):
+                return True
+        return False
+
+    def _redraw(self, scale, screen_offset_x, screen_offset_y):
+        self.scale = scale
+        self.offset = (screen_offset_x, screen_offset_y)
+        self.surface.fill(self.background)
+        self.trails = {}
+        for body in self.bodies:
+            state = self._trail_state(body)
+            if state is None:
+                continue
+            draw_trail(self.surface, body.orbit, state[2], scale, screen_offset_x + self.margin,
+                       screen_offset_y + self.margin, self.background)
+            self.trails[body] = (*state, body.orbit.total, body.orbit.total)
+        self.redraws += 1
+
+    def _append(self):
+        """Draw the segments added since the last frame."""
+        import pygame
+
+        for body, (trail, generation, palette, redrawn, drawn) in self.trails.items():
+            new = trail.total - drawn
+            if new <= 0:
+                continue
+            points = trail.ordered()[-(new + 1):]  # Starting at the last drawn point
+            if len(points) >= 2:
+                screen = points * self.scale
+                screen += (constants.WIDTH / 2 + self.offset[0] + self.margin,
+                           constants.HEIGHT / 2 + self.offset[1] + self.margin)
+                pygame.draw.lines(self.surface, palette[-1], False, screen.tolist(), 1)
+            self.trails[body] = (trail, generation, palette, redrawn, trail.total)
+
+    def draw(self, surface, scale, screen_offset_x=0, screen_offset_y=0):
+        """Bring the layer up to date and blit it over the whole screen."""
+        shift_x = screen_offset_x - self.offset[0]
+        shift_y = screen_offset_y - self.offset[1]
+        if self._needs_redraw(scale, shift_x, shift_y):
+            self._redraw(scale, screen_offset_x, screen_offset_y)
+            shift_x = shift_y = 0
+        else:
+            self._append()
+        surface.blit(self.surface, (shift_x - self.margin, shift_y - self.margin))
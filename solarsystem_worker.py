@@ -0,0 +1,186 @@
+# solarsystem_worker.py
+
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+from solarsystem_sim import wrap_angle
+
+
+class TrackedSteps:
+    """Positions of the tracked bodies after the worker's steps, queued for the render thread.
+
+    Only the last `capacity` steps are kept, older points would have left
+    the trails anyway. The angle every body sweeps around the Sun is summed
+    over all queued steps, so the orbit counters stay exact however many
+    steps are dropped, and handing the queue over costs at most `capacity`
+    steps whatever the physics rate.
+    """
+
+    def __init__(self, simulation, capacity):
+        self.simulation = simulation
+        self.points = np.zeros((max(capacity, 1), len(simulation.tracked), 2))
+        self.count = 0  # Steps queued, including the dropped ones
+        self.sweeps = np.zeros(len(simulation.tracked))
+        self.angles = None  # Angles around the Sun after the last step
+        self.sync()
+
+    def sync(self):
+        """Continue the angle sums from the current state, after the simulation was changed."""
+        self.angles = self.simulation.tracked_angles(self.simulation.state.positions[self.simulation.tracked])
+
+    def append(self, positions):
+        self.points[self.count % len(self.points)] = positions
+        self.count += 1
+        if self.angles is not None:
+            angles = self.simulation.tracked_angles(positions)
+            self.sweeps += wrap_angle(angles - self.angles)
+            self.angles = angles
+
+    def continue_from(self, other):
+        """Empty this queue and continue where `other` ends."""
+        self.count = 0
+        self.sweeps[:] = 0
+        self.angles = other.angles
+
+    def record(self):
+        """Update the trails and orbit counters with the queued steps (render thread)."""
+        if self.count == 0:
+            return
+        capacity = len(self.points)
+        kept = min(self.count, capacity)
+        start = (self.count - kept) % capacity
+        # Oldest first, the ring may wrap around
+        steps = self.points[start:start + kept]
+        if len(steps) < kept:
+            steps = np.concatenate((steps, self.points[:kept - len(steps)]))
+        sweeps = None if self.angles is None else self.sweeps
+        self.simulation.record_steps(steps, sweeps, self.angles)
+        self.count = 0
+
+
+class Snapshot:
+    """Positions and simulated time published by the simulation worker."""
+
+    def __init__(self, count):
+        self.pos = np.zeros((count, 2))
+        self.elapsed_time = 0.0
+        self.step_count = 0
+        self.tracked = None  # TrackedSteps since the previous latest(), record() them on the render thread
+
+
+class SimulationWorker(threading.Thread):
+    """Run the physics in a background thread, decoupled from rendering.
+
+    The worker steps the simulation on its own schedule and publishes
+    position snapshots through a triple buffer: it writes into a private back
+    buffer and swaps it with the front buffer, while the render loop keeps
+    the buffer it is currently drawing. Neither side ever waits on the other
+    for more than a pointer swap.
+
+    Trails, orbit counters and flash timers belong to the render thread: the
+    worker steps without updating them and queues the positions of the
+    tracked bodies after every step instead (TrackedSteps). latest() hands the
+    queued steps over with the snapshot, and the render loop records them.
+    """
+
+    def __init__(self, simulation, steps_per_second=None):
+        super().__init__(name="SimulationWorker", daemon=True)
+        self.simulation = simulation
+        self.steps_per_second = steps_per_second  # None runs as fast as possible
+
+        # Held while stepping, take it via paused() to modify the simulation
+        self.lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+        # Triple buffer: back (worker), front (latest), reading (renderer)
+        count = simulation.state.count
+        self._back = Snapshot(count)
+        self._front = Snapshot(count)
+        self._reading = Snapshot(count)
+        self._buffer_lock = threading.Lock()
+        self._fresh = False
+        # Steps queued since the last latest() and the queue handed over then, guarded by _buffer_lock
+        capacity = max((body.orbit.capacity for body in simulation.tracked_bodies), default=0)
+        self._queued = TrackedSteps(simulation, capacity)
+        self._handed = TrackedSteps(simulation, capacity)
+        self._publish()
+
+    def run(self):
+        next_step = time.perf_counter()
+        while not self._stop_event.is_set():
+            with self.lock:
+                self.simulation.step(record=False)
+                self._publish(self.simulation.state.positions[self.simulation.tracked])
+
+            if self.steps_per_second:
+                next_step += 1 / self.steps_per_second
+                delay = next_step - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_step = time.perf_counter()
+            else:
+                # Let the render thread get the GIL and the lock
+                time.sleep(0)
+
+    def _publish(self, tracked=None):
+        """Copy the current state into the back buffer and swap it to the front.
+
+        `tracked` are the positions of the tracked bodies after a worker step,
+        queued for the trail bookkeeping.
+        """
+        back = self._back
+        np.copyto(back.pos, self.simulation.state.positions)
+        back.elapsed_time = self.simulation.elapsed_time
+        back.step_count = self.simulation.step_count
+
+        with self._buffer_lock:
+            self._back, self._front = self._front, back
+            self._fresh = True
+            if tracked is not None:
+                self._queued.append(tracked)
+
+    def _take_queued(self):
+        """Swap the queue of tracked steps with the one handed over last time and return it.
+
+        Call with _buffer_lock held.
+        """
+        self._handed.continue_from(self._queued)
+        self._queued, self._handed = self._handed, self._queued
+        return self._handed
+
+    def latest(self):
+        """Return the most recent snapshot, valid until the next call.
+
+        Its `tracked` steps were taken since the previous call, the caller
+        records them (TrackedSteps.record()) before the next call.
+        """
+        with self._buffer_lock:
+            if self._fresh:
+                self._reading, self._front = self._front, self._reading
+                self._fresh = False
+            self._reading.tracked = self._take_queued()
+        return self._reading
+
+    @contextmanager
+    def paused(self):
+        """Context manager that holds the worker between two steps.
+
+        Call it from the render thread: the queued trail steps are recorded
+        first, so the simulation is complete while it is modified or saved.
+        """
+        with self.lock:
+            with self._buffer_lock:
+                queued = self._take_queued()
+            queued.record()
+            yield self.simulation
+            self._queued.sync()
+            self._publish()
+
+    def stop(self):
+        """Stop the worker and wait for the current step to finish."""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
@@ -0,0 +1,30 @@
+# conftest.py
+
+import math
+import os
+import sys
+
+import pytest
+
+# The modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import constants  # noqa: E402
+from solarsystem_sim import Body, Sun, Planet, Simulation  # noqa: E402
+from solarsystem_state import StateStore  # noqa: E402
+
+
+@pytest.fixture
+def simulation(monkeypatch):
+    """Sun at rest with Mercury, Earth and Jupiter on circular orbits, as at startup."""
+    monkeypatch.setattr(Body, "STATE", StateStore())
+    monkeypatch.setattr(Body, "TIMESTEP", constants.TIMESTEP)
+    monkeypatch.setattr(Planet, "PRINT_ORBITS", False)
+    bodies = [Sun(0, 0, 2, constants.sun_mass)]
+    for name, distance, mass in (("Mercury", 0.387, 3.30e23), ("Earth", 1.0, 5.97e24), ("Jupiter", 5.2, 1.898e27)):
+        planet = Planet(distance * constants.AU, 0, 5, mass, name=name)
+        planet.y_vel = math.sqrt(constants.G * constants.sun_mass / (distance * constants.AU))
+        bodies.append(planet)
+    simulation = Simulation(bodies)
+    yield simulation
+    simulation.close()
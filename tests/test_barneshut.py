@@ -0,0 +1,40 @@
+# test_barneshut.py
+
+import constants
+import numpy as np
+from solarsystem_barneshut import QuadTree
+
+
+def belt_particles(count=1000, seed=0):
+    """Asteroid-belt particles with masses spread over five decades."""
+    rng = np.random.default_rng(seed)
+    radius = rng.uniform(2.1, 3.3, count) * constants.AU
+    angle = rng.uniform(0, 2 * np.pi, count)
+    pos = np.column_stack((radius * np.cos(angle), radius * np.sin(angle)))
+    return pos, rng.uniform(1e15, 1e20, count)
+
+
+def direct_accelerations(targets, pos, mass):
+    """Softened pairwise sum, as the tree computes it for leaves."""
+    d = pos[np.newaxis, :, :] - targets[:, np.newaxis, :]
+    r2 = np.einsum("kmj,kmj->km", d, d) + constants.BARNES_HUT_SOFTENING ** 2
+    return constants.G * np.einsum("kmj,km->kj", d, mass / (r2 * np.sqrt(r2)))
+
+
+def test_tree_matches_direct_summation():
+    pos, mass = belt_particles()
+    expected = direct_accelerations(pos, pos, mass)
+    acc = QuadTree(pos, mass, opening_angle=constants.BARNES_HUT_OPENING_ANGLE).accelerations(pos)
+
+    error = np.linalg.norm(acc - expected, axis=1)
+    magnitude = np.linalg.norm(expected, axis=1)
+    assert np.median(error / magnitude) < 1e-2
+    # Relative errors are large only where the pulls nearly cancel
+    assert error.max() < 0.05 * np.median(magnitude)
+
+
+def test_tiny_opening_angle_is_direct_summation():
+    pos, mass = belt_particles(count=300, seed=1)
+    expected = direct_accelerations(pos, pos, mass)
+    acc = QuadTree(pos, mass, opening_angle=1e-3).accelerations(pos)
+    np.testing.assert_allclose(acc, expected, rtol=1e-9, atol=1e-12 * np.abs(expected).max())
@@ -0,0 +1,51 @@
+# test_fast_forward.py
+
+import constants
+import math
+import time
+import pytest
+from solarsystem_sim import Body
+
+YEAR = 365.25 * 24 * 3600
+
+
+def fast_forward_steps(simulation, duration):
+    start_steps = simulation.step_count
+    start = time.perf_counter()
+    simulation.advance(duration)
+    assert time.perf_counter() - start < 30
+    return simulation.step_count - start_steps
+
+
+def test_time_scale_ignores_the_sun(simulation):
+    for _ in range(2):
+        simulation.step()
+    # Mercury's orbit, not the few days the Sun has been moving
+    mercury_period = 88 * 24 * 3600
+    assert simulation._shortest_time_scale() == pytest.approx(mercury_period / (2 * math.pi), rel=0.05)
+
+
+def test_fast_forward_after_startup(simulation):
+    for _ in range(2):
+        simulation.step()
+    steps = fast_forward_steps(simulation, 10 * YEAR)
+    assert steps <= 10 * YEAR / constants.TIMESTEP
+
+
+def test_fast_forward_after_time_reversal(simulation):
+    for _ in range(2):
+        simulation.step()
+    # [-] twice: one day backwards, the Sun comes to rest again
+    Body.TIMESTEP = -constants.TIMESTEP
+    for _ in range(2):
+        simulation.step()
+    steps = fast_forward_steps(simulation, 10 * YEAR)
+    assert steps <= 10 * YEAR / constants.TIMESTEP
+
+
+def test_fast_forward_counts_orbits(simulation):
+    simulation.advance(10.5 * YEAR)
+    counts = {body.name: body.orbit_count for body in simulation.bodies if body.name != "Sun"}
+    # Mercury 87.97 days, Earth 365.25 days, Jupiter 11.86 years
+    assert counts == {"Mercury": 43, "Earth": 10, "Jupiter": 0}
+    assert all(len(body.orbit.ordered()) == 0 for body in simulation.tracked_bodies)
@@ -0,0 +1,64 @@
+# test_integrators.py
+
+import constants
+import math
+import numpy as np
+from solarsystem_integrators import assign_levels, block_leapfrog_step
+
+DAY = 24 * 3600
+
+
+def point_masses(masses):
+    """Direct-summation accelerations for a small set of point masses."""
+    def accel(pos, targets=None):
+        targets = np.arange(len(pos)) if targets is None else targets
+        offsets = pos[np.newaxis, :, :] - pos[targets, np.newaxis, :]
+        distance_sq = np.einsum("ijk,ijk->ij", offsets, offsets)
+        distance_sq[distance_sq == 0] = np.inf
+        return constants.G * np.einsum("ij,ijk->ik", masses / distance_sq ** 1.5, offsets)
+    return accel
+
+
+def sun_mercury_jupiter():
+    """Sun, Mercury and Jupiter on circular orbits around a moving Sun."""
+    masses = np.array([constants.sun_mass, 3.30e23, 1.898e27])
+    radii = np.array([0.0, 0.387, 5.2]) * constants.AU
+    pos = np.zeros((3, 2))
+    pos[:, 0] = radii
+    vel = np.zeros((3, 2))
+    vel[1:, 1] = np.sqrt(constants.G * masses[0] / radii[1:])
+    # Barycentric reflex motion of the Sun
+    vel[0] = -(masses[1:, np.newaxis] * vel[1:]).sum(axis=0) / masses[0]
+    return pos, vel, point_masses(masses)
+
+
+def test_sun_stays_on_base_level():
+    pos, vel, accel = sun_mercury_jupiter()
+    acc = accel(pos)
+    for days in (1, 2, 4, 8):
+        levels = assign_levels(vel, acc, days * DAY, reference=0)
+        assert levels[0] == 0
+        assert levels[1] > levels[2]
+
+
+def test_negative_step_uses_same_levels():
+    pos, vel, accel = sun_mercury_jupiter()
+    acc = accel(pos)
+    forward = assign_levels(vel, acc, 4 * DAY, reference=0)
+    backward = assign_levels(vel, acc, -4 * DAY, reference=0)
+    np.testing.assert_array_equal(forward, backward)
+
+
+def test_negative_step_runs_backwards():
+    pos, vel, accel = sun_mercury_jupiter()
+    start_pos, start_vel = pos.copy(), vel.copy()
+    block_leapfrog_step(pos, vel, 4 * DAY, accel, reference=0)
+    block_leapfrog_step(pos, vel, -4 * DAY, accel, reference=0)
+    # Leapfrog is time-reversible, up to the level choice at the new state
+    assert np.abs(pos - start_pos).max() < 1e-6 * constants.AU
+    assert np.abs(vel - start_vel).max() < 1e-3 * np.abs(start_vel).max()
+
+    # A reversed step still moves Mercury back along its orbit
+    block_leapfrog_step(pos, vel, -4 * DAY, accel, reference=0)
+    angle = math.atan2(pos[1, 1] - pos[0, 1], pos[1, 0] - pos[0, 0])
+    assert angle < 0
@@ -0,0 +1,39 @@
+# test_kepler.py
+
+import constants
+import numpy as np
+from solarsystem_kepler import KeplerOrbits, solve_kepler
+
+MU = constants.G * constants.sun_mass
+
+
+def belt_orbits(solver=solve_kepler):
+    """A few eccentric asteroid-belt orbits."""
+    radii = np.array([2.2, 2.7, 3.1]) * constants.AU
+    rel_pos = np.column_stack((radii, np.zeros(3)))
+    rel_vel = np.column_stack((np.zeros(3), 1.2 * np.sqrt(MU / radii)))
+    return KeplerOrbits(rel_pos, rel_vel, MU, solver=solver)
+
+
+def test_solver_gets_reduced_mean_anomaly():
+    seen = []
+
+    def solver(mean_anomaly, e, guess=None):
+        seen.append(mean_anomaly)
+        return solve_kepler(mean_anomaly, e, guess)
+
+    orbits = belt_orbits(solver)
+    day = 24 * 3600
+    for time in np.arange(0, 20000 * day, 50 * day):
+        orbits.state_at(time)
+    seen = np.concatenate(seen)
+    assert seen.min() >= 0 and seen.max() < 2 * np.pi
+
+
+def test_state_repeats_after_many_orbits():
+    orbits = belt_orbits()
+    period = 2 * np.pi / orbits.mean_motion[0]
+    start_pos, start_vel = orbits.state_at(0.25 * period)
+    pos, vel = orbits.state_at(1000.25 * period)
+    assert np.abs(pos[0] - start_pos[0]).max() < 1e-6 * constants.AU
+    assert np.abs(vel[0] - start_vel[0]).max() < 1e-6 * np.abs(start_vel[0]).max()
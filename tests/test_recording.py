@@ -0,0 +1,29 @@
+# test_recording.py
+
+import numpy as np
+from solarsystem_checkpoint import load_checkpoint
+from solarsystem_recording import Replay, TrajectoryRecorder, bodies_path
+
+
+def test_replay_keeps_the_saved_trails(simulation, tmp_path):
+    for _ in range(5):
+        simulation.step()
+    path = str(tmp_path / "run.traj")
+    simulation.recorder = TrajectoryRecorder(path, simulation)
+    for _ in range(3):
+        simulation.step()
+    simulation.recorder.close()
+
+    bodies, _ = load_checkpoint(bodies_path(path))
+    earth = next(body for body in bodies if getattr(body, "name", "") == "Earth")
+    saved = earth.orbit.ordered().copy()
+    assert len(saved) == 5
+
+    replay = Replay(path)
+    replay.update_trails(bodies, 0)
+    np.testing.assert_array_equal(earth.orbit.ordered(), saved)
+
+    replay.update_trails(bodies, 3)
+    trail = earth.orbit.ordered()
+    np.testing.assert_array_equal(trail[:5], saved)
+    np.testing.assert_allclose(trail[5:], replay.positions[1:4, earth.index], rtol=1e-6)
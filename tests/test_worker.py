@@ -0,0 +1,52 @@
+# test_worker.py
+
+import time
+import numpy as np
+from solarsystem_worker import SimulationWorker, TrackedSteps
+
+
+def run_worker(simulation, steps):
+    worker = SimulationWorker(simulation)
+    worker.start()
+    deadline = time.perf_counter() + 30
+    while simulation.step_count < steps and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    return worker
+
+
+def test_trails_are_recorded_on_the_render_thread(simulation):
+    worker = run_worker(simulation, 100)
+    worker.stop()
+    mercury = simulation.tracked_bodies[1]
+    # The worker only queues the steps
+    assert simulation.step_count >= 100
+    assert mercury.orbit.total == 0 and mercury.orbit_count == 0
+
+    snapshot = worker.latest()
+    snapshot.tracked.record()
+    assert mercury.orbit.total == simulation.step_count == snapshot.step_count
+    assert mercury.orbit_count >= 1
+    assert worker.latest().tracked.count == 0
+
+
+def test_paused_records_queued_steps(simulation):
+    worker = run_worker(simulation, 10)
+    try:
+        with worker.paused():
+            assert simulation.tracked_bodies[1].orbit.total == simulation.step_count
+    finally:
+        worker.stop()
+
+
+def test_queue_keeps_orbit_counts_of_dropped_steps(simulation):
+    queued = TrackedSteps(simulation, capacity=5)
+    for _ in range(300):
+        simulation.step(record=False)
+        queued.append(simulation.state.positions[simulation.tracked])
+    queued.record()
+
+    mercury = simulation.tracked_bodies[1]
+    assert mercury.orbit.total == 5
+    np.testing.assert_allclose(mercury.orbit.ordered()[-1], simulation.state.positions[mercury.index], rtol=1e-6)
+    # 300 days are three orbits of 88 days
+    assert mercury.orbit_count == 3